@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+
+from .model import ConwaysGameOfLife, initial_states, next_row
+from .rules import make_rule
+
+# Muchas corridas del mismo ConwaysGameOfLife con distintas semillas, para estadísticas.
+# En lugar de un modelo (y sus agentes) por semilla, los K grids se apilan en un solo arreglo
+# (K, height, width) y la regla se aplica a todos en la misma operación de NumPy.
+
+
+class ConwaysEnsemble:
+    """
+    K corridas independientes del ConwaysGameOfLife en un arreglo (K, height, width).
+    Args:
+        seeds: Lista de semillas, una por corrida (o un entero K para usar las semillas 0..K-1)
+        width, height, initial_fraction_alive: Los mismos parámetros del modelo
+        rule: La misma regla del modelo (game_of_life/rules.py), None para la regla 90
+    La corrida k empieza igual que ConwaysGameOfLife(..., seed=seeds[k]) y termina con el mismo estado.
+    """
+    def __init__(self, seeds, width=50, height=50, initial_fraction_alive=0.2, rule=None):
+        if isinstance(seeds, int):
+            seeds = range(seeds)
+        self.seeds = list(seeds)
+        self.width = width
+        self.height = height
+        self.initial_fraction_alive = initial_fraction_alive
+        self.rule = make_rule(rule)
+        # Con esta regla, ¿una fila sin celdas vivas deja muerta a la siguiente?
+        self._dead_stays_dead = not next_row(np.zeros(width, dtype=np.int8), self.rule).any()
+
+        self.states = np.stack([
+            initial_states(random.Random(seed), width, height, initial_fraction_alive)
+            for seed in self.seeds
+        ])
+        self.current_row = np.full(len(self.seeds), height - 1) # Última fila calculada de cada corrida
+        self.running = np.ones(len(self.seeds), dtype=bool)     # Qué corridas siguen avanzando
+        self._update_running()
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def _update_running(self):
+        # Al llegar a la fila 0 la corrida termina. Si la fila actual no tiene vivas (y la regla
+        # deja muertas las vecindades muertas) las que faltan también quedarían DEAD, que es como
+        # ya están, así que esa corrida termina antes.
+        self.running &= self.current_row > 0
+        if self._dead_stays_dead:
+            rows = self.states[np.arange(len(self.seeds)), self.current_row]
+            self.running &= rows.any(axis=1)
+
+    def step(self):
+        """
+        Calcula la siguiente fila de todas las corridas que siguen activas.
+        """
+        active = np.flatnonzero(self.running)
+        if len(active) == 0:
+            return
+        row = self.current_row[active[0]] - 1 # Las corridas activas van todas en la misma fila
+        self.states[active, row] = next_row(self.states[active, row + 1], self.rule)
+        self.current_row[active] = row
+        self._update_running()
+
+    def run(self, steps=None):
+        """
+        Avanza hasta que todas las corridas se detengan o hasta dar steps pasos.
+        """
+        done = 0
+        while self.running.any() and (steps is None or done < steps):
+            self.step()
+            done += 1
+
+    def alive_fraction(self):
+        """
+        Fracción de celdas vivas de cada corrida, arreglo (K,).
+        """
+        return self.states.mean(axis=(1, 2))
+
+    def member(self, k):
+        """
+        Regresa un ConwaysGameOfLife con el estado actual de la corrida k (para verla en el dashboard).
+        """
+        model = ConwaysGameOfLife(self.width, self.height, self.initial_fraction_alive, seed=self.seeds[k], rule=self.rule)
+        model.states = self.states[k].copy()
+        model.current_row = int(self.current_row[k])
+        model.running = bool(self.running[k])
+        return model
@@ -1,17 +1,76 @@
+import numpy as np
 from mesa import Model
+from mesa.datacollection import DataCollector
 from mesa.discrete_space import OrthogonalMooreGrid
+from mesa.discrete_space import Cell as GridCell
 from .agent import Cell
+from . import metrics
+from .rules import DEFAULT_RULE, make_rule
 
 # El modelo se encarga de que se ejecuten las acciones de cada agente, define el ambiente donde estan los agentes.
 
+def initial_states(rng, width, height, initial_fraction_alive):
+    """Estado inicial (height, width) indexado [y, x] a partir del random.Random rng.
+    Solo la primera fila de la simulación (height - 1) tiene celdas vivas, las demás empiezan DEAD.
+    """
+    states = np.zeros((height, width), dtype=np.int8)
+    for x in range(width):
+        if rng.random() < initial_fraction_alive:
+            states[height - 1, x] = Cell.ALIVE
+    return states
+
+
+def next_row(up, rule=None):
+    """Siguiente fila a partir de la fila de arriba (con torus horizontal) con la regla de
+    game_of_life/rules.py. Sin regla es la de Cell.determine_state: la celda vive si exactamente
+    uno de sus vecinos de arriba a la izquierda y a la derecha vive (regla 90).
+    Funciona igual con una fila (width,) o con varias (..., width).
+    """
+    if rule is None or (rule.is_elementary and rule.number == DEFAULT_RULE):
+        return np.roll(up, 1, axis=-1) ^ np.roll(up, -1, axis=-1)
+    return rule.apply(up)
+
+
 class ConwaysGameOfLife(Model):
-    """Represents the 2-dimensional array of cells in Conway's Game of Life."""
+    """Represents the 2-dimensional array of cells in Conway's Game of Life.
+
+    El estado de todas las celdas vive en self.states, un arreglo (height, width) de int8
+    indexado [y, x]. El grid de Mesa y los agentes Cell se construyen hasta que se piden
+    (self.grid, self.cell_agent, self.cell_grid), por ejemplo para la vista de agentes del dashboard.
+    """
 
-    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None): # Importante para poder actualizar el modelo.
-        """Create a new playing area of (width, height) cells."""
+    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None, collect_every=1, rule=None): # Importante para poder actualizar el modelo.
+        """Create a new playing area of (width, height) cells.
+        collect_every: Cada cuántos pasos el DataCollector guarda las métricas, None para no guardarlas.
+        rule: Regla de game_of_life/rules.py o número de Wolfram de una regla elemental, None para la regla 90.
+        """
         super().__init__(seed=seed)
 
-        """Grid where cells are connected to their 8 neighbors.
+        self.width = width
+        self.height = height
+        self.rule = make_rule(rule)
+        self._grid = None
+        self._cell_agents = {} # Coordenada -> agente Cell ya creado
+
+        # Acceso a los agentes en base a las coordenadas, se crean al pedirlos.
+        self.cell_grid = CellGrid(self)
+
+        self.current_row = height - 1  # Comenzar desde la ultima fila (height - 1)
+        self._changed_cells = 0 # Celdas que cambiaron en el último paso, para ChangeRate
+
+        # Place a cell at each location, with some initialized to
+        # ALIVE and some to DEAD.
+        self.states = initial_states(self.random, width, height, initial_fraction_alive)
+
+        # Métricas calculadas sobre self.states (game_of_life/metrics.py)
+        self.collect_every = collect_every
+        self.datacollector = DataCollector(model_reporters=metrics.model_reporters())
+
+        self.running = True
+
+    @property
+    def grid(self):
+        """Grid where cells are connected to their 8 neighbors, se construye la primera vez que se pide.
 
         Example for two dimensions:
         directions = [
@@ -20,33 +79,30 @@ class ConwaysGameOfLife(Model):
             ( 1, -1), ( 1, 0), ( 1, 1),
         ]
         """
-        self.grid = OrthogonalMooreGrid((width, height), capacity=1, torus=True)
-
-        # Place a cell at each location, with some initialized to
-        # ALIVE and some to DEAD.
-        # Solo para la primera fila de celdas en la simulación.
-
-        self.cell_grid = {}
-
-        self.current_row = height - 1  # Comenzar desde la ultima fila (height - 1)
-
+        if self._grid is None:
+            self._grid = OrthogonalMooreGrid((self.width, self.height), capacity=1, torus=True)
+            # Pasar los agentes que se crearon antes del grid a sus celdas del grid
+            for coordinate, agent in self._cell_agents.items():
+                agent._mesa_cell = None
+                agent.cell = self._grid[coordinate]
+        return self._grid
+
+    def cell_agent(self, x, y):
+        """Regresa el agente Cell de la coordenada (x, y), creándolo si todavía no existe.
+        Si el grid no se ha construido el agente usa una celda suelta, así inspeccionar unas
+        cuantas celdas de un grid grande no construye las width * height celdas de Mesa.
+        """
+        agent = self._cell_agents.get((x, y))
+        if agent is None:
+            cell = self._grid[(x, y)] if self._grid is not None else GridCell((x, y), capacity=1, random=self.random)
+            agent = Cell(self, cell)
+            self._cell_agents[(x, y)] = agent
+        return agent
+
+    def materialize_agents(self):
+        """Crea los agentes Cell de todas las celdas (para la vista de agentes de Mesa)."""
         for cell in self.grid.all_cells:
-            x, y = cell.coordinate
-            init_state = (
-                Cell.ALIVE
-                if (y == self.current_row and self.random.random() < initial_fraction_alive) # Solo la fila inicial
-                else Cell.DEAD
-            )
-            agent = Cell(
-                self,   # modelo
-                cell,   # celda 
-                init_state=init_state,
-            )
-            # Acceso rápido a los agentes en base a las coordenadas.
-            self.cell_grid[(x, y)] = agent
-
-        self.running = True
-
+            self.cell_agent(*cell.coordinate)
 
     def step(self):
         # Detener cuando la simulacion cuando llegue a la fila 0
@@ -54,19 +110,78 @@ class ConwaysGameOfLife(Model):
             self.running = False
             return
 
-        width = self.grid.width # Ancho del grid
+        row = self.current_row - 1 # La siguiente fila a actualizar
+
+        # La siguiente fila solo depende de la actual (la de arriba)
+        new_row = next_row(self.states[self.current_row], self.rule)
+        self._changed_cells = int((new_row != self.states[row]).sum()) # Solo cambia esta fila
+        self.states[row] = new_row
+
+        self.current_row = row # Moverse a la siguiente fila hacia abajo
+        self.collect()
+
+    def collect(self):
+        """Guarda las métricas en el DataCollector si toca según collect_every."""
+        if self.collect_every and self.steps % self.collect_every == 0:
+            self.datacollector.collect(self)
+
+    def change_rate(self):
+        """Fracción de celdas que cambiaron en el último paso."""
+        return self._changed_cells / self.states.size
+
+    def _read_only(self, array):
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    def iter_rows(self):
+        """Generador que avanza el modelo y entrega cada fila nueva como (y, vista de solo lectura
+        de self.states[y]), sin copiarla. Una fila ya calculada no vuelve a cambiar.
+        El modelo solo avanza cuando se pide la siguiente fila: un consumidor lento frena la
+        simulación en lugar de acumular filas. Termina al llegar a la fila 0.
+        """
+        while self.running:
+            self.step()
+            if not self.running:
+                return
+            yield self.current_row, self._read_only(self.states[self.current_row])
+
+    def iter_generations(self, generations=None):
+        """Como iter_rows, pero entrega la vista de solo lectura de todo el grid (height, width)
+        después de cada paso. La vista es del mismo arreglo que se va llenando: las filas de
+        abajo de current_row se siguen escribiendo en los pasos siguientes.
+        """
+        done = 0
+        for _ in self.iter_rows():
+            yield self._read_only(self.states)
+            done += 1
+            if generations is not None and done >= generations:
+                return
+
+    def state_array(self):
+        """Regresa el estado de todas las celdas como arreglo (height, width), indexado [y, x]."""
+        return self.states.copy()
+
+    def snapshot(self):
+        """Foto ligera del estado para dibujar sin tocar el modelo."""
+        return {"step": self.steps, "states": self.state_array()}
+
 
-        next_row = self.current_row - 1 # La siguiente fila a actualizar
+class CellGrid:
+    """Vista de solo lectura coordenada -> agente Cell que crea los agentes al pedirlos."""
 
-        # Primero determinar el estado de la siguiente fila
-        for x in range(width):
-            next_agent = self.cell_grid[(x, next_row)]
-            next_agent.determine_state()
+    def __init__(self, model):
+        self.model = model
 
-        # Ahora actualizar el estado de la siguiente fila
-        for x in range(width):
-            next_agent = self.cell_grid[(x, next_row)]
-            next_agent.assume_state()
+    def __getitem__(self, coordinate):
+        x, y = coordinate
+        if not (0 <= x < self.model.width and 0 <= y < self.model.height):
+            raise KeyError(coordinate)
+        return self.model.cell_agent(x, y)
 
-        self.current_row = next_row # Moverse a la siguiente fila hacia abajo
+    def __contains__(self, coordinate):
+        x, y = coordinate
+        return 0 <= x < self.model.width and 0 <= y < self.model.height
 
+    def __len__(self):
+        return self.model.width * self.model.height
@@ -0,0 +1,167 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .model import ConwaysGameOfLife
+
+# Caché en disco de resultados de corridas completas.
+# Los modelos son deterministas dada la semilla, así que una corrida con los mismos parámetros
+# (y el mismo código) siempre da el mismo resultado. Cada resultado se guarda en un .npz cuyo
+# nombre es el hash de la clase del modelo, sus parámetros y la versión del código (hash de los
+# .py del paquete); si se cambia el código, las entradas viejas ya no coinciden.
+# El directorio tiene un tamaño máximo: al pasarse se borran las entradas usadas hace más tiempo.
+
+DEFAULT_DIR = os.environ.get("RESULT_CACHE_DIR", ".result_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_code_versions = {}
+
+
+def code_version(model_cls):
+    """Hash del código fuente del paquete donde está definida la clase del modelo."""
+    package = Path(inspect.getfile(model_cls)).parent
+    if package not in _code_versions:
+        digest = hashlib.sha256()
+        for path in sorted(package.glob("*.py")):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        _code_versions[package] = digest.hexdigest()
+    return _code_versions[package]
+
+
+def _canonical(value):
+    """Convierte un parámetro en algo que json puede escribir siempre igual (por ejemplo, una regla)."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if hasattr(value, "__dict__"):
+        return [type(value).__name__, _canonical(vars(value))]
+    return value
+
+
+def cache_key(model_cls, params, **extra):
+    """Llave de una corrida: clase del modelo, parámetros, versión del código y extras (como los pasos)."""
+    content = {
+        "model": f"{model_cls.__module__}.{model_cls.__qualname__}",
+        "params": _canonical(params),
+        "code": code_version(model_cls),
+        "extra": _canonical(extra),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Resultados guardados en disco, direccionados por contenido, con desalojo LRU por tamaño.
+    Args:
+        directory: Carpeta de la caché
+        max_bytes: Tamaño máximo de la carpeta
+    """
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.directory / f"{key}.npz"
+
+    def get(self, key):
+        """
+        Regresa (arreglos, meta) guardados con la llave, o None si no están.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files if name != "meta"}
+                meta = json.loads(str(data["meta"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError): # Entrada incompleta o dañada
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path) # Marcar como usada recientemente para el LRU
+        return arrays, meta
+
+    def put(self, key, arrays, meta):
+        """
+        Guarda arreglos de NumPy y un diccionario meta (que json pueda escribir) con la llave.
+        """
+        # Escribir a un archivo temporal y renombrarlo, así nunca queda una entrada a medias
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Borra las entradas usadas hace más tiempo hasta que la carpeta quepa en max_bytes.
+        """
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _pack_states(frames):
+    states = np.stack(frames)
+    return {"states": np.packbits(states.astype(bool))}, list(states.shape)
+
+
+def _unpack_states(arrays, shape):
+    count = int(np.prod(shape))
+    return np.unpackbits(arrays["states"], count=count).reshape(shape).astype(np.int8)
+
+
+def cached_run(params, steps=None, cache=None):
+    """
+    Corre ConwaysGameOfLife(**params) steps pasos (None para correr hasta la fila 0), o regresa
+    el resultado guardado de una corrida igual.
+    Regresa {"states": trayectoria (pasos + 1, height, width), "model_vars": métricas del DataCollector}.
+    """
+    cache = cache or ResultCache()
+    key = cache_key(ConwaysGameOfLife, params, steps=steps)
+    hit = cache.get(key)
+    if hit is not None:
+        arrays, meta = hit
+        return {"states": _unpack_states(arrays, meta["shape"]), "model_vars": meta["model_vars"]}
+
+    model = ConwaysGameOfLife(**params)
+    frames = [model.state_array()]
+    for _ in model.iter_generations(steps):
+        frames.append(model.state_array()) # La vista es del arreglo que se sigue llenando, copiarla
+    arrays, shape = _pack_states(frames)
+    meta = {"shape": shape, "model_vars": model.datacollector.model_vars}
+    cache.put(key, arrays, meta)
+    return {"states": np.stack(frames), "model_vars": meta["model_vars"]}
+
+
+def sweep(param_list, steps=None, cache=None):
+    """
+    cached_run para cada conjunto de parámetros; los que ya estaban guardados no se vuelven a correr.
+    """
+    cache = cache or ResultCache()
+    return [cached_run(params, steps, cache) for params in param_list]
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Reglas 1D de radio r para el autómata. La celda (x, y) se calcula con las 2r + 1 celdas de la
+# fila de arriba, de x - r a x + r (con torus horizontal). Cell.determine_state es el caso r = 1
+# con la regla 90: LookupRule(90).
+#
+# - LookupRule: tabla completa, un resultado por cada combinación de las 2r + 1 celdas
+# - TotalisticRule: el resultado solo depende de cuántas celdas de la ventana están vivas
+# - OuterTotalisticRule: depende de la celda de en medio y de cuántas de las otras 2r están vivas
+#
+# Las sumas de las ventanas se sacan con sumas acumuladas de la fila extendida con torus, así cada
+# fila cuesta O(width) sin importar el radio (ni convolución ni FFT).
+
+DEFAULT_RULE = 90 # Número de Wolfram de Cell.determine_state
+
+
+def window_sums(rows, radius, include_centre=True):
+    """Suma de cada ventana x - radius .. x + radius de las filas (..., width), con torus horizontal."""
+    width = rows.shape[-1]
+    # Extender cada fila con torus; las ventanas más anchas que la fila dan la vuelta varias veces
+    index = np.arange(-radius - 1, width + radius) % width
+    padded = rows[..., index].astype(np.int32)
+    padded[..., 0] = 0 # Celda extra para que la suma acumulada empiece en 0
+    prefix = np.cumsum(padded, axis=-1)
+    sums = prefix[..., 2 * radius + 1:] - prefix[..., :width]
+    if not include_centre:
+        sums -= rows
+    return sums
+
+
+class LookupRule:
+    """
+    Regla con tabla completa de radio r.
+    Args:
+        number: Número de Wolfram, el bit i es el resultado cuando la ventana, leída de izquierda
+            a derecha como número binario, vale i
+        radius: Radio de la vecindad (r = 1 son las reglas elementales, 0 a 255)
+    """
+    def __init__(self, number=DEFAULT_RULE, radius=1):
+        size = 2 * radius + 1
+        if not 0 <= number < 1 << (1 << size):
+            raise ValueError(f"La regla {number} no existe para radio {radius}")
+        self.number = number
+        self.radius = radius
+        self.table = np.array([(number >> i) & 1 for i in range(1 << size)], dtype=np.int8)
+
+    @property
+    def is_elementary(self):
+        """True si es una regla de radio 1 (la que soportan HashLife y el kernel de Numba)."""
+        return self.radius == 1
+
+    def apply(self, up):
+        """Siguiente estado de cada celda a partir de las filas de arriba (..., width)."""
+        index = np.zeros(up.shape, dtype=np.int64)
+        for d in range(-self.radius, self.radius + 1): # La celda de la izquierda es el bit más alto
+            index = (index << 1) | np.roll(up, -d, axis=-1)
+        return self.table[index]
+
+
+class TotalisticRule:
+    """
+    Regla totalística de radio r.
+    Args:
+        outputs: outputs[s] es el siguiente estado cuando s de las 2r + 1 celdas de la ventana viven
+        radius: Radio de la vecindad
+    """
+    def __init__(self, outputs, radius=1):
+        if len(outputs) != 2 * radius + 2:
+            raise ValueError(f"Se necesitan {2 * radius + 2} resultados para radio {radius}")
+        self.outputs = np.asarray(outputs, dtype=np.int8)
+        self.radius = radius
+        self.is_elementary = False
+
+    def apply(self, up):
+        return self.outputs[window_sums(up, self.radius)]
+
+
+class OuterTotalisticRule:
+    """
+    Regla totalística externa de radio r.
+    Args:
+        outputs: outputs[c][s] es el siguiente estado cuando la celda de en medio vale c y
+            s de las otras 2r celdas viven
+        radius: Radio de la vecindad
+    """
+    def __init__(self, outputs, radius=1):
+        self.outputs = np.asarray(outputs, dtype=np.int8)
+        if self.outputs.shape != (2, 2 * radius + 1):
+            raise ValueError(f"Se necesita una tabla de 2 x {2 * radius + 1} para radio {radius}")
+        self.radius = radius
+        self.is_elementary = False
+
+    def apply(self, up):
+        return self.outputs[up, window_sums(up, self.radius, include_centre=False)]
+
+
+def make_rule(rule=None):
+    """Convierte el parámetro rule del modelo en una regla: None es la regla 90, un número
+    (o texto, como lo manda el dashboard) es una regla elemental y cualquier otra cosa se usa tal cual."""
+    if rule is None or rule == "":
+        return LookupRule(DEFAULT_RULE)
+    if isinstance(rule, (int, str)):
+        return LookupRule(int(rule))
+    return rule
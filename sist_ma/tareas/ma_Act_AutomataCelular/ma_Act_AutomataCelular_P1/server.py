@@ -1,22 +1,8 @@
 from game_of_life.model import ConwaysGameOfLife
-from mesa.visualization import (
-    SolaraViz,
-    make_space_component,
-)
 
-from mesa.visualization.components import AgentPortrayalStyle
-
-def agent_portrayal(agent):
-    return AgentPortrayalStyle(
-        color="white" if agent.state == 0 else "black", # DEAD is 0, ALIVE is 1 
-        marker="s", # square
-        size=30,
-    )
-
-def post_process(ax): # Para quitar los ejes y los numeros de las graficas
-    ax.set_aspect("equal")
-    ax.set_xticks([])
-    ax.set_yticks([])
+# La visualización (Solara, matplotlib, mesa.visualization) vive en dashboard.py y se importa
+# hasta que Solara pide la página. Importar este módulo solo para reutilizar el modelo o sus
+# parámetros no carga esas librerías ni construye un modelo.
 
 model_params = { # Diccionario con los parametros del modelo, un json.
     "seed": {
@@ -48,20 +34,32 @@ model_params = { # Diccionario con los parametros del modelo, un json.
         "max": 1,
         "step": 0.01,
     },
+    "rule": {
+        "type": "InputText",
+        "value": 90,
+        "label": "Rule (Wolfram number, radius 1)",
+    },
+    "collect_every": {
+        "type": "SliderInt",
+        "value": 1,
+        "label": "Collect metrics every (steps)",
+        "min": 1,
+        "max": 50,
+        "step": 1,
+    },
 }
 
-# Create initial model instance
-gof_model = ConwaysGameOfLife() 
+def initial_params():
+    """Regresa los valores iniciales de model_params listos para crear el modelo."""
+    return {name: param["value"] for name, param in model_params.items()}
 
-space_component = make_space_component( # Visualizacion del espacio
-        agent_portrayal,
-        draw_grid = False, # No dibujar la cuadricula de mathplotlib
-        post_process=post_process
-)
+def make_model():
+    """Create initial model instance"""
+    return ConwaysGameOfLife(**initial_params())
 
-page = SolaraViz( # Controlar el modelo
-    gof_model,
-    components=[space_component],
-    model_params=model_params,
-    name="Game of Life",
-)
+def __getattr__(name):
+    # `solara run server.py` busca Page; la visualización se importa solo en ese momento
+    if name in ("Page", "page"):
+        from dashboard import Page
+        return Page
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
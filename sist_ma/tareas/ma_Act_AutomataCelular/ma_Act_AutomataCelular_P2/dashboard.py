@@ -0,0 +1,154 @@
+# Visualización del ConwaysGameOfLife. server.py importa este módulo hasta que Solara pide la página,
+# así importar server.py (o game_of_life) no carga Solara, matplotlib ni mesa.visualization.
+from game_of_life.background import ReplayWorker, SimulationWorker
+from game_of_life.result_cache import cached_run
+from server import model_params, make_model, initial_params
+from mesa.visualization import (
+    SolaraViz,
+    make_plot_component,
+    make_space_component,
+)
+
+from mesa.visualization.components import AgentPortrayalStyle
+from mesa.visualization.utils import update_counter
+
+import time
+
+import solara
+from matplotlib.colors import ListedColormap
+from matplotlib.figure import Figure
+
+# Dibujar el grid como imagen (un solo imshow) en lugar de un marcador por celda.
+# Con False se usa la vista de Mesa con agent_portrayal.
+USE_RASTER = True
+
+# Con True la simulación corre en un hilo de fondo y la página solo muestra sus snapshots
+BACKGROUND_MODE = False
+FRAME_BUFFER = 1000  # Snapshots que se guardan para poder regresar o adelantar
+# Con True el modo en segundo plano toma la trayectoria de la caché de resultados
+# (game_of_life/result_cache.py) en lugar de simular; la primera vez la calcula y la guarda
+USE_RESULT_CACHE = False
+
+RASTER_COLORS = ListedColormap(["white", "black"]) # DEAD es blanco, ALIVE es negro
+
+def agent_portrayal(agent):
+    return AgentPortrayalStyle(
+        color="white" if agent.state == 0 else "black", # DEAD is 0, ALIVE is 1 
+        marker="s", # square
+        size=30,
+    )
+
+def post_process(ax): # Para quitar los ejes y los numeros de las graficas
+    ax.set_aspect("equal")
+    ax.set_xticks([])
+    ax.set_yticks([])
+
+def draw_snapshot(snapshot, post_process=None):
+    """Dibuja el estado de todas las celdas con un solo imshow."""
+    fig = Figure()
+    ax = fig.add_subplot()
+    ax.imshow(
+        snapshot["states"], # Indexado [y, x], origin lower deja la fila 0 abajo como en Mesa
+        origin="lower",
+        cmap=RASTER_COLORS,
+        vmin=0,
+        vmax=1,
+        interpolation="nearest",
+    )
+
+    if post_process is not None:
+        post_process(ax)
+
+    solara.FigureMatplotlib(fig, format="png", bbox_inches="tight")
+
+@solara.component
+def RasterSpace(model, post_process=None):
+    update_counter.get()
+    draw_snapshot(model.snapshot(), post_process=post_process)
+
+def make_raster_component(post_process=None):
+    def MakeRasterSpace(model):
+        return RasterSpace(model, post_process=post_process)
+
+    return MakeRasterSpace
+
+if USE_RASTER:
+    space_component = make_raster_component(post_process=post_process)
+else:
+    agent_space_component = make_space_component( # Visualizacion del espacio
+            agent_portrayal,
+            draw_grid = False, # No dibujar la cuadricula de mathplotlib
+            post_process=post_process
+    )
+
+    def space_component(model):
+        # El modelo crea los agentes Cell bajo demanda, la vista de agentes necesita todos
+        model.materialize_agents()
+        return agent_space_component(model)
+
+plot_component = make_plot_component(
+    [
+        "Density",    # Fracción de celdas vivas
+        "ChangeRate", # Fracción de celdas que cambiaron en el último paso
+    ],
+)
+
+def make_worker(gof_model):
+    """Worker para BackgroundPage: la trayectoria guardada o una simulación en un hilo de fondo."""
+    if USE_RESULT_CACHE:
+        trajectory = cached_run(initial_params(), FRAME_BUFFER - 1)["states"]
+        return ReplayWorker({"step": step, "states": states} for step, states in enumerate(trajectory))
+    return SimulationWorker(gof_model, buffer_size=FRAME_BUFFER)
+
+@solara.component
+def BackgroundPage(gof_model):
+    """Página para el modo en segundo plano: el modelo avanza en un SimulationWorker y aquí solo
+    se dibujan sus snapshots al ritmo de la página, saltando los cuadros intermedios.
+    Con "En vivo" apagado se puede recorrer el buffer con el slider.
+    """
+    worker = solara.use_memo(lambda: make_worker(gof_model), [])
+    fps = solara.use_reactive(10)
+    live = solara.use_reactive(True)
+    index = solara.use_reactive(0)
+    _, set_tick = solara.use_state(0)
+
+    def refresh(cancel):
+        # Redibujar a un ritmo fijo sin importar qué tan rápido avanza la simulación
+        while not cancel.is_set():
+            time.sleep(1 / fps.value)
+            set_tick(lambda tick: tick + 1)
+
+    solara.use_thread(refresh, dependencies=[])
+    solara.use_effect(lambda: worker.stop, []) # Detener el hilo al cerrar la página
+
+    frames = len(worker)
+    snapshot = worker.latest() if live.value else worker.frame(index.value)
+
+    with solara.Sidebar():
+        with solara.Card("Simulación en segundo plano"):
+            solara.Button(
+                "❚❚" if worker.playing else "▶",
+                color="primary",
+                on_click=lambda: worker.pause() if worker.playing else worker.start(),
+            )
+            solara.SliderInt("Cuadros por segundo", value=fps, min=1, max=30)
+            solara.Checkbox(label="En vivo", value=live)
+            solara.SliderInt("Cuadro", value=index, min=0, max=max(0, frames - 1), disabled=live.value)
+            solara.Text(f"Paso {snapshot['step']} ({frames} cuadros en el buffer)")
+
+    draw_snapshot(snapshot, post_process=post_process)
+
+@solara.component
+def Page():
+    # El primer modelo se construye hasta que la página se dibuja por primera vez
+    gof_model = solara.use_memo(make_model, [])
+
+    if BACKGROUND_MODE:
+        BackgroundPage(gof_model)
+    else:
+        SolaraViz( # Controlar el modelo
+            gof_model,
+            components=[space_component, plot_component],
+            model_params=model_params,
+            name="Game of Life",
+        )
@@ -1,8 +1,16 @@
 # FixedAgent: Immobile agents permanently fixed to cells
 from mesa.discrete_space import FixedAgent # No le permitas mover este agente con FixedAgent
 
+# Desplazamientos de la vecindad de Moore
+MOORE = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
 class Cell(FixedAgent): # La clase de celula esta heredando los comportamientos base de FixedAgent
-    """Represents a single ALIVE or DEAD cell in the simulation."""
+    """Represents a single ALIVE or DEAD cell in the simulation.
+
+    El estado no vive en el agente sino en el arreglo model.states (indexado [y, x]); el agente
+    solo es una vista de su posición. El modelo crea estos agentes hasta que alguien los pide
+    (model.cell_agent), así una simulación sin visualización de agentes no crea ninguno.
+    """
 
     DEAD = 0
     ALIVE = 1
@@ -15,21 +23,36 @@ class Cell(FixedAgent): # La clase de celula esta heredando los comportamientos
     def y(self):
         return self.cell.coordinate[1]
 
+    @property
+    def state(self):
+        x, y = self.pos
+        return int(self.model.states[y, x])
+
+    @state.setter
+    def state(self, value):
+        x, y = self.pos
+        self.model.states[y, x] = value
+
     @property
     def is_alive(self):
         return self.state == self.ALIVE
 
     @property
     def neighbors(self):
-        return self.cell.neighborhood.agents
+        # Los vecinos también se crean bajo demanda, con torus en ambos ejes
+        width, height = self.model.width, self.model.height
+        return [
+            self.model.cell_agent((self.x + dx) % width, (self.y + dy) % height) for dx, dy in MOORE
+        ]
     
-    def __init__(self, model, cell, init_state=DEAD): # Constructor de la clase Cell
-        """Create a cell, in the given state, at the given x, y position."""
+    def __init__(self, model, cell, init_state=None): # Constructor de la clase Cell
+        """Create a cell at the given x, y position. Con init_state se sobreescribe su estado en model.states."""
         super().__init__(model) # Manda a llamar el constructor de la clase padre FixedAgent con el modelo como parametro
         # Marca atributos de la clase Cell usando self.xxxxxx
         self.cell = cell
         self.pos = cell.coordinate
-        self.state = init_state
+        if init_state is not None:
+            self.state = init_state
         self._next_state = None
 
     def determine_state(self):
@@ -80,8 +103,8 @@ class Cell(FixedAgent): # La clase de celula esta heredando los comportamientos
         top_neighbors = [None, None, None] # Inicializa la lista de vecinos de arriba
 
         # Usar modulo para considerar el grid con el torus solo de manera vertical.
-        height = self.model.grid.height
-        width = self.model.grid.width
+        height = self.model.height
+        width = self.model.width
 
         target_y = (self.y + 1) % height # La fila de arriba
 
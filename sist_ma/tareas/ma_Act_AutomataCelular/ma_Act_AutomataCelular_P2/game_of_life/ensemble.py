@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+
+from .model import ConwaysGameOfLife, initial_states, next_states
+from .rules import make_rule
+
+# Muchas corridas del mismo ConwaysGameOfLife con distintas semillas, para estadísticas.
+# En lugar de un modelo (y sus agentes) por semilla, los K grids se apilan en un solo arreglo
+# (K, height, width) y la regla se aplica a todos en la misma operación de NumPy.
+
+
+class ConwaysEnsemble:
+    """
+    K corridas independientes del ConwaysGameOfLife en un arreglo (K, height, width).
+    Args:
+        seeds: Lista de semillas, una por corrida (o un entero K para usar las semillas 0..K-1)
+        width, height, initial_fraction_alive: Los mismos parámetros del modelo
+        max_steps: Pasos máximos de cada corrida, None para no tener límite
+        rule: La misma regla del modelo (game_of_life/rules.py), None para la regla 90
+    La corrida k empieza igual que ConwaysGameOfLife(..., seed=seeds[k]) y sigue igual paso a paso.
+    """
+    def __init__(self, seeds, width=50, height=50, initial_fraction_alive=0.2, max_steps=None, rule=None):
+        if isinstance(seeds, int):
+            seeds = range(seeds)
+        self.seeds = list(seeds)
+        self.width = width
+        self.height = height
+        self.initial_fraction_alive = initial_fraction_alive
+        self.max_steps = max_steps
+        self.rule = make_rule(rule)
+        # Con esta regla, ¿un grid sin celdas vivas se queda así?
+        self._dead_stays_dead = not next_states(np.zeros((1, height, width), dtype=np.int8), self.rule).any()
+
+        self.states = np.stack([
+            initial_states(random.Random(seed), width, height, initial_fraction_alive)
+            for seed in self.seeds
+        ])
+        self.steps = np.zeros(len(self.seeds), dtype=np.int64) # Pasos que ha dado cada corrida
+        self.running = np.ones(len(self.seeds), dtype=bool)    # Qué corridas siguen avanzando
+        self._update_running()
+
+    def __len__(self):
+        return len(self.seeds)
+
+    def _update_running(self):
+        # Un grid sin celdas vivas ya no cambia (si la regla deja muertas las vecindades muertas),
+        # esa corrida se detiene
+        if self._dead_stays_dead:
+            self.running &= self.states.any(axis=(1, 2))
+        if self.max_steps is not None:
+            self.running &= self.steps < self.max_steps
+
+    def step(self):
+        """
+        Avanza un paso todas las corridas que siguen activas.
+        """
+        if not self.running.any():
+            return
+        if self.running.all():
+            self.states = next_states(self.states, self.rule)
+        else:
+            self.states[self.running] = next_states(self.states[self.running], self.rule)
+        self.steps[self.running] += 1
+        self._update_running()
+
+    def run(self, steps=None):
+        """
+        Avanza hasta que todas las corridas se detengan o hasta dar steps pasos.
+        """
+        done = 0
+        while self.running.any() and (steps is None or done < steps):
+            self.step()
+            done += 1
+
+    def alive_fraction(self):
+        """
+        Fracción de celdas vivas de cada corrida, arreglo (K,).
+        """
+        return self.states.mean(axis=(1, 2))
+
+    def member(self, k):
+        """
+        Regresa un ConwaysGameOfLife con el estado actual de la corrida k (para verla en el dashboard).
+        """
+        model = ConwaysGameOfLife(self.width, self.height, self.initial_fraction_alive, seed=self.seeds[k], rule=self.rule)
+        model.states = self.states[k].copy()
+        model.steps = int(self.steps[k])
+        return model
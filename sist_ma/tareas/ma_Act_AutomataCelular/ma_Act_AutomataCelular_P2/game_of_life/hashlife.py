@@ -0,0 +1,207 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# HashLife en 1D para correr muchas generaciones de golpe.
+# La regla de Cell.determine_state solo ve las 3 celdas de la fila de arriba, así que cada fila
+# es un autómata elemental (1D) en un anillo de width celdas:
+#     estado_g[y] = f^g(estado_0[(y + g) % height])
+# donde f es un paso de la regla sobre una fila. HashLife representa una fila como un árbol
+# binario de bloques; los bloques iguales son el mismo nodo (hash-consing) y el resultado de
+# avanzar un bloque se guarda, así que los patrones repetidos (por ejemplo, una fila periódica)
+# se calculan una sola vez por nivel y se pueden saltar 2^k generaciones en O(width * k).
+# Como cada fila vive en un anillo finito, su evolución termina siendo periódica; jump() primero
+# busca ese ciclo para todo el grid y solo usa el árbol si el periodo es más largo que cycle_limit.
+
+RULE_90 = 90 # Número de Wolfram de la regla de Cell.determine_state (los 8 casos 111..000 -> 01011010)
+
+
+class Node:
+    """
+    Bloque de 2^level celdas. Las hojas (level 0) son una celda con value 0 o 1,
+    los demás nodos son la unión de dos bloques de level - 1.
+    """
+    __slots__ = ("level", "left", "right", "value")
+
+    def __init__(self, level, left=None, right=None, value=0):
+        self.level = level
+        self.left = left
+        self.right = right
+        self.value = value
+
+
+class HashLife1D:
+    """
+    Motor HashLife para una regla elemental (radio 1) sobre filas en anillo.
+    Args:
+        rule: Número de Wolfram de la regla (0 a 255)
+        cache_size: Máximo de nodos y de resultados guardados, los menos usados se descartan
+        cycle_limit: Pasos que jump() avanza buscando el periodo del grid antes de usar el árbol
+    """
+    def __init__(self, rule=RULE_90, cache_size=1 << 20, cycle_limit=4096):
+        # table[(a << 2) | (b << 1) | c] es el siguiente estado de b con vecinos a y c
+        self.table = [(rule >> i) & 1 for i in range(8)]
+        self.cache_size = cache_size
+        self.cycle_limit = cycle_limit
+        self.leaves = (Node(0, value=0), Node(0, value=1))
+        self._nodes = OrderedDict()   # (left, right) -> nodo canónico
+        self._results = OrderedDict() # (nodo, j) -> centro del nodo después de 2^j generaciones
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False) # Descartar el menos usado
+
+    def join(self, left, right):
+        """
+        Regresa el nodo canónico que une los bloques left y right.
+        """
+        key = (left, right)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(left.level + 1, left, right)
+            self._remember(self._nodes, key, node)
+        else:
+            self._nodes.move_to_end(key)
+        return node
+
+    def centre(self, node):
+        """
+        Mitad central del nodo, sin avanzar generaciones.
+        """
+        return self.join(node.left.right, node.right.left)
+
+    def advance(self, node, j):
+        """
+        Regresa la mitad central (level - 1) del nodo después de 2^j generaciones, con j <= level - 2.
+        Fuera de la mitad central el resultado dependería de celdas que no están en el nodo.
+        """
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return result
+
+        if node.level == 2: # Caso base: 4 celdas a, b, c, d -> b y c una generación después
+            a, b = node.left.left.value, node.left.right.value
+            c, d = node.right.left.value, node.right.right.value
+            table = self.table
+            result = self.join(
+                self.leaves[table[(a << 2) | (b << 1) | c]],
+                self.leaves[table[(b << 2) | (c << 1) | d]],
+            )
+        else:
+            # Cuartos A B C D del nodo y los tres bloques de level - 1 que se traslapan
+            n0 = node.left
+            n1 = self.join(node.left.right, node.right.left)
+            n2 = node.right
+            if j == node.level - 2:
+                # Avanzar 2^(j-1) en cada mitad del camino
+                r0, r1, r2 = self.advance(n0, j - 1), self.advance(n1, j - 1), self.advance(n2, j - 1)
+                step = j - 1
+            else:
+                # Menos generaciones que el máximo del nivel: la primera mitad no avanza
+                r0, r1, r2 = self.centre(n0), self.centre(n1), self.centre(n2)
+                step = j
+            result = self.join(self.advance(self.join(r0, r1), step), self.advance(self.join(r1, r2), step))
+
+        self._remember(self._results, key, result)
+        return result
+
+    def _build(self, row, offset, level, memo):
+        """
+        Nodo con las celdas offset .. offset + 2^level de la fila repetida (en anillo).
+        """
+        key = (offset % len(row), level)
+        node = memo.get(key)
+        if node is None:
+            if level == 0:
+                node = self.leaves[int(row[offset % len(row)])]
+            else:
+                half = 1 << (level - 1)
+                node = self.join(
+                    self._build(row, offset, level - 1, memo),
+                    self._build(row, offset + half, level - 1, memo),
+                )
+            memo[key] = node
+        return node
+
+    def _read(self, node, count, out):
+        """
+        Agrega a out las primeras count celdas del nodo.
+        """
+        if count <= 0:
+            return
+        if node.level == 0:
+            out.append(node.value)
+            return
+        half = 1 << (node.level - 1)
+        self._read(node.left, min(count, half), out)
+        self._read(node.right, count - half, out)
+
+    def _jump_power(self, row, j):
+        """
+        Fila después de 2^j generaciones.
+        """
+        width = len(row)
+        # El nodo de entrada tiene que cubrir 2^j celdas a cada lado de la fila y su mitad central
+        # (2^(level-1) celdas) tiene que alcanzar para las width celdas
+        level = max(j + 2, int(width - 1).bit_length() + 1, 2)
+        quarter = 1 << (level - 2)
+        node = self._build(row, -quarter, level, {}) # La mitad central empieza en la celda 0
+        out = []
+        self._read(self.advance(node, j), width, out)
+        return np.array(out, dtype=row.dtype)
+
+    def jump_row(self, row, generations):
+        """
+        Aplica la regla generations veces a una fila en anillo.
+        """
+        row = np.asarray(row)
+        j = 0
+        while generations:
+            if generations & 1:
+                row = self._jump_power(row, j)
+            generations >>= 1
+            j += 1
+        return row
+
+    def step_rows(self, rows):
+        """
+        Un paso de la regla en cada fila (..., width), con torus horizontal.
+        """
+        index = (np.roll(rows, 1, axis=-1) << 2) | (rows << 1) | np.roll(rows, -1, axis=-1)
+        return np.asarray(self.table, dtype=rows.dtype)[index]
+
+    def _reduce_by_cycle(self, rows, generations):
+        """
+        Avanza las filas hasta cycle_limit pasos buscando un estado repetido. Regresa
+        (filas, generaciones que faltan): si encuentra el ciclo, las que faltan ya son menos que
+        un periodo y se avanzan paso a paso, si no, se quedan para el árbol.
+        """
+        seen = {} # Huella del estado de todas las filas -> generación
+        current = rows
+        for t in range(min(generations, self.cycle_limit) + 1):
+            if t == generations:
+                return current, 0
+            key = hashlib.blake2b(current.tobytes(), digest_size=16).digest()
+            if key in seen:
+                first = seen[key]
+                remaining = (generations - t) % (t - first) # Mismo estado que en generations
+                for _ in range(remaining):
+                    current = self.step_rows(current)
+                return current, 0
+            seen[key] = t
+            current = self.step_rows(current)
+        return current, generations - self.cycle_limit - 1
+
+    def jump(self, states, generations):
+        """
+        Estado (height, width) del ConwaysGameOfLife después de generations pasos:
+        estado_g[y] = f^g(estado_0[(y + g) % height]).
+        """
+        rows, remaining = self._reduce_by_cycle(states, generations)
+        if remaining:
+            rows = np.stack([self.jump_row(row, remaining) for row in rows])
+        return np.roll(rows, -(generations % len(states)), axis=0)
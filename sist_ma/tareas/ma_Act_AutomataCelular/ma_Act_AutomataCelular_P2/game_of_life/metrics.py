@@ -0,0 +1,42 @@
+import numpy as np
+
+# Métricas del autómata calculadas sobre el arreglo de estados (height, width) indexado [y, x],
+# con operaciones de NumPy en lugar de recorrer las celdas. Las usa el DataCollector del modelo.
+
+
+def density(states):
+    """Fracción de celdas vivas."""
+    return float(states.mean())
+
+
+def row_entropy(states):
+    """Entropía de Shannon (en bits) de la fracción de vivas de cada fila, promediada sobre las filas.
+    0 si cada fila es toda viva o toda muerta, 1 si cada fila tiene la mitad viva."""
+    p = states.mean(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        h = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+    return float(np.nan_to_num(h).mean())
+
+
+def live_runs(states):
+    """Número de tramos de celdas vivas seguidas en las filas (con torus horizontal)."""
+    starts = (states == 1) & (np.roll(states, 1, axis=-1) == 0) # Celda viva con la izquierda muerta
+    full = states.all(axis=-1) # Una fila toda viva es un solo tramo sin inicio
+    return int(starts.sum() + full.sum())
+
+
+def change_rate(previous, states):
+    """Fracción de celdas que cambiaron de estado entre previous y states."""
+    if previous is None:
+        return 0.0
+    return float((previous != states).mean())
+
+
+def model_reporters():
+    """Reportadores para el DataCollector de ConwaysGameOfLife."""
+    return {
+        "Density": lambda m: density(m.states),
+        "RowEntropy": lambda m: row_entropy(m.states),
+        "LiveRuns": lambda m: live_runs(m.states),
+        "ChangeRate": lambda m: m.change_rate(),
+    }
@@ -1,17 +1,84 @@
+import numpy as np
 from mesa import Model
+from mesa.datacollection import DataCollector
 from mesa.discrete_space import OrthogonalMooreGrid
+from mesa.discrete_space import Cell as GridCell
 from .agent import Cell
+from . import metrics
+from .hashlife import HashLife1D
+from .kernel import next_states_kernel
+from .rules import DEFAULT_RULE, make_rule
 
 # El modelo se encarga de que se ejecuten las acciones de cada agente, define el ambiente donde estan los agentes.
 
+def initial_states(rng, width, height, initial_fraction_alive):
+    """Estado inicial (height, width) indexado [y, x] a partir del random.Random rng.
+    Se consume un número aleatorio por celda en el mismo orden que grid.all_cells
+    (x por fuera, y por dentro) para que la misma semilla dé el mismo estado inicial.
+    """
+    draws = np.fromiter(
+        (rng.random() for _ in range(width * height)), dtype=float, count=width * height
+    ).reshape(width, height)
+    return np.ascontiguousarray((draws < initial_fraction_alive).T, dtype=np.int8) # Filas contiguas [y, x]
+
+
+def next_states(states, rule=None):
+    """Siguiente generación de todo el grid (con torus en ambos ejes) con la regla de
+    game_of_life/rules.py. Sin regla es la de Cell.determine_state: la celda vive si exactamente
+    uno de sus vecinos de arriba a la izquierda y a la derecha vive (regla 90).
+    Funciona igual con un solo grid (height, width) o con varios (..., height, width).
+    Con Numba instalado los grids grandes con reglas de radio 1 usan el kernel de game_of_life/kernel.py.
+    """
+    if rule is not None and not rule.is_elementary:
+        return rule.apply(np.roll(states, -1, axis=-2))
+    number = DEFAULT_RULE if rule is None else rule.number
+    result = next_states_kernel(states, number)
+    if result is not None:
+        return result
+    up = np.roll(states, -1, axis=-2)
+    if number == DEFAULT_RULE:
+        return np.roll(up, 1, axis=-1) ^ np.roll(up, -1, axis=-1)
+    return rule.apply(up)
+
+
 class ConwaysGameOfLife(Model):
-    """Represents the 2-dimensional array of cells in Conway's Game of Life."""
+    """Represents the 2-dimensional array of cells in Conway's Game of Life.
 
-    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None): # Importante para poder actualizar el modelo.
-        """Create a new playing area of (width, height) cells."""
+    El estado de todas las celdas vive en self.states, un arreglo (height, width) de int8
+    indexado [y, x]. El grid de Mesa y los agentes Cell se construyen hasta que se piden
+    (self.grid, self.cell_agent), por ejemplo para la vista de agentes del dashboard.
+    """
+
+    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None, collect_every=1, rule=None): # Importante para poder actualizar el modelo.
+        """Create a new playing area of (width, height) cells.
+        collect_every: Cada cuántos pasos el DataCollector guarda las métricas, None para no guardarlas.
+        rule: Regla de game_of_life/rules.py o número de Wolfram de una regla elemental, None para la regla 90.
+        """
         super().__init__(seed=seed)
 
-        """Grid where cells are connected to their 8 neighbors.
+        self.width = width
+        self.height = height
+        self.rule = make_rule(rule)
+        self._grid = None
+        self._cell_agents = {} # Coordenada -> agente Cell ya creado
+        self._hashlife = None  # Motor para jump(), se crea la primera vez que se usa
+        self._previous = None  # Generación anterior, para ChangeRate
+
+        self.current_row = height - 1  # Comenzar desde la ultima fila (height - 1)
+
+        # Place a cell at each location, with some initialized to
+        # ALIVE and some to DEAD.
+        self.states = initial_states(self.random, width, height, initial_fraction_alive)
+
+        # Métricas calculadas sobre self.states (game_of_life/metrics.py)
+        self.collect_every = collect_every
+        self.datacollector = DataCollector(model_reporters=metrics.model_reporters())
+
+        self.running = True
+
+    @property
+    def grid(self):
+        """Grid where cells are connected to their 8 neighbors, se construye la primera vez que se pide.
 
         Example for two dimensions:
         directions = [
@@ -20,31 +87,78 @@ class ConwaysGameOfLife(Model):
             ( 1, -1), ( 1, 0), ( 1, 1),
         ]
         """
-        self.grid = OrthogonalMooreGrid((width, height), capacity=1, torus=True)
+        if self._grid is None:
+            self._grid = OrthogonalMooreGrid((self.width, self.height), capacity=1, torus=True)
+            # Pasar los agentes que se crearon antes del grid a sus celdas del grid
+            for coordinate, agent in self._cell_agents.items():
+                agent._mesa_cell = None
+                agent.cell = self._grid[coordinate]
+        return self._grid
 
-        # Place a cell at each location, with some initialized to
-        # ALIVE and some to DEAD.
-        # Solo para la primera fila de celdas en la simulación.
+    def cell_agent(self, x, y):
+        """Regresa el agente Cell de la coordenada (x, y), creándolo si todavía no existe.
+        Si el grid no se ha construido el agente usa una celda suelta, así inspeccionar unas
+        cuantas celdas de un grid grande no construye las width * height celdas de Mesa.
+        """
+        agent = self._cell_agents.get((x, y))
+        if agent is None:
+            cell = self._grid[(x, y)] if self._grid is not None else GridCell((x, y), capacity=1, random=self.random)
+            agent = Cell(self, cell)
+            self._cell_agents[(x, y)] = agent
+        return agent
 
-        self.cell_grid = {}
+    def materialize_agents(self):
+        """Crea los agentes Cell de todas las celdas (para la vista de agentes de Mesa)."""
+        for cell in self.grid.all_cells:
+            self.cell_agent(*cell.coordinate)
 
-        self.current_row = height - 1  # Comenzar desde la ultima fila (height - 1)
+    def step(self):
+        # La regla solo depende de la fila de arriba (y + 1), se calcula todo el grid a la vez
+        self._previous = self.states # next_states crea otro arreglo, no hace falta copiar
+        self.states = next_states(self.states, self.rule)
+        self.collect()
 
-        for cell in self.grid.all_cells:
-            Cell(
-                self,
-                cell,
-                init_state=(
-                    Cell.ALIVE
-                    if self.random.random() < initial_fraction_alive
-                    else Cell.DEAD
-                ),
-            )
+    def jump(self, generations):
+        """Avanza el modelo generations pasos de golpe con HashLife (game_of_life/hashlife.py),
+        el resultado es el mismo que llamar step() generations veces. Solo para reglas de radio 1.
+        """
+        if not self.rule.is_elementary:
+            raise ValueError("jump() solo funciona con reglas elementales (LookupRule de radio 1)")
+        if self._hashlife is None:
+            self._hashlife = HashLife1D(self.rule.number)
+        self.states = self._hashlife.jump(self.states, generations)
+        self.steps += generations
+        self._previous = None # Las generaciones intermedias no se calculan ni se guardan
 
-        self.running = True
+    def iter_generations(self, generations=None):
+        """Generador que avanza el modelo y entrega cada nueva generación como vista de solo
+        lectura (height, width) de self.states, sin copiarla (memoryview(vista) tampoco copia).
+        Cada paso crea un arreglo nuevo, así que una vista ya entregada no cambia después.
+        El modelo solo avanza cuando se pide la siguiente generación: un consumidor lento
+        (codificador, estadísticas, red) frena la simulación en lugar de acumular cuadros.
+        Termina al dar generations pasos (None para no tener límite) o si el modelo se detiene.
+        """
+        done = 0
+        while self.running and (generations is None or done < generations):
+            self.step()
+            done += 1
+            view = self.states.view()
+            view.flags.writeable = False
+            yield view
 
+    def collect(self):
+        """Guarda las métricas en el DataCollector si toca según collect_every."""
+        if self.collect_every and self.steps % self.collect_every == 0:
+            self.datacollector.collect(self)
 
-    def step(self):
-        # Realizar el paso del modelo en dos etapas:
-        self.agents.do("determine_state")
-        self.agents.do("assume_state")
+    def change_rate(self):
+        """Fracción de celdas que cambiaron en el último paso."""
+        return metrics.change_rate(self._previous, self.states)
+
+    def state_array(self):
+        """Regresa el estado de todas las celdas como arreglo (height, width), indexado [y, x]."""
+        return self.states.copy()
+
+    def snapshot(self):
+        """Foto ligera del estado para dibujar sin tocar el modelo."""
+        return {"step": self.steps, "states": self.state_array()}
@@ -1,94 +1,43 @@
-from random_agents.agent import RoombaRobot, ObstacleAgent, DirtPatch, ChargingStation # Importar las clases necesarias de nuestros agentes
 from random_agents.model import RandomModel # Importar el modelo
 
-from mesa.visualization import (
-    Slider,
-    SolaraViz,
-    make_space_component,
-    make_plot_component
-)
-
-from mesa.visualization.components import AgentPortrayalStyle
-
-def random_portrayal(agent):
-    if agent is None:
-        return
-
-    portrayal = AgentPortrayalStyle(
-        size=50,
-        marker="o",
-    )
-
-    if isinstance(agent, ChargingStation):
-        portrayal.color = "blue"
-        portrayal.marker = "s"
-        portrayal.size = 80
-    elif isinstance(agent, RoombaRobot):
-        if agent.state != "DEAD":
-            portrayal.color = "red"
-            portrayal.size = 70
-        else:
-            portrayal.color = "black"
-            portrayal.size = 70
-    elif isinstance(agent, ObstacleAgent):
-        portrayal.color = "gray"
-        portrayal.marker = "s"
-        portrayal.size = 100
-    elif isinstance(agent, DirtPatch):
-        if agent.dirty:
-            portrayal.color = "brown" # sucia
-            portrayal.size = 50
-        else:
-            portrayal.color = "white" # limpia
-            portrayal.size = 50
-
-    return portrayal
-
-def post_process(ax):
-    ax.set_aspect("equal")
+# La visualización (Solara, matplotlib, mesa.visualization) vive en dashboard.py y se importa
+# hasta que Solara pide la página. Importar este módulo solo para reutilizar el modelo o sus
+# parámetros no carga esas librerías ni construye un modelo.
 
 model_params = {
     "seed": {
         "type": "InputText",
         "value": 42,
         "label": "Random Seed",
-    }, 
-    "num_agents": Slider("Number of Roombas", 5, 1, 10),
-    "width": Slider("Grid width", 28, 1, 50),
-    "height": Slider("Grid height", 28, 1, 50),
-    "percent_dirty": Slider("Percentage of dirty patches", 0.3, 0.0, 1.0, 0.05),
-    "percent_obstacles": Slider("Percentage of obstacle patches", 0.05, 0.0, 0.3, 0.05),
-    "max_steps": Slider("Maximum steps", 3000, 1000, 20000, 1000),
+    },
+    "num_agents": {"type": "SliderInt", "value": 5, "label": "Number of Roombas", "min": 1, "max": 10, "step": 1},
+    "width": {"type": "SliderInt", "value": 28, "label": "Grid width", "min": 1, "max": 50, "step": 1},
+    "height": {"type": "SliderInt", "value": 28, "label": "Grid height", "min": 1, "max": 50, "step": 1},
+    "percent_dirty": {"type": "SliderFloat", "value": 0.3, "label": "Percentage of dirty patches", "min": 0.0, "max": 1.0, "step": 0.05},
+    "percent_obstacles": {"type": "SliderFloat", "value": 0.05, "label": "Percentage of obstacle patches", "min": 0.0, "max": 0.3, "step": 0.05},
+    "max_steps": {"type": "SliderInt", "value": 3000, "label": "Maximum steps", "min": 1000, "max": 20000, "step": 1000},
+    "use_property_layers": {"type": "Checkbox", "value": False, "label": "Dirt and obstacles as property layers"},
+    "sensor_radius": {"type": "SliderInt", "value": 1, "label": "Sensor radius", "min": 1, "max": 5, "step": 1},
+    "exploration": {"type": "Select", "value": "random", "values": ["random", "coverage"], "label": "Exploration mode"},
+    "allocation": {"type": "Select", "value": "local", "values": ["local", "market"], "label": "Dirt allocation"},
+    "collect_every": {"type": "SliderInt", "value": 1, "label": "Collect metrics every N steps", "min": 1, "max": 100, "step": 1},
 }
 
-# Create the model using the initial parameters from the settings
-model = RandomModel(
-    num_agents=model_params["num_agents"].value,
-    width=model_params["width"].value,
-    height=model_params["height"].value,
-    percent_dirty=model_params["percent_dirty"].value,
-    percent_obstacles=model_params["percent_obstacles"].value,
-    max_steps=model_params["max_steps"].value,
-    seed=model_params["seed"]["value"]
-)
-
-space_component = make_space_component(
-        random_portrayal,
-        draw_grid = False,
-        post_process=post_process
-)
-
-plot_component = make_plot_component(
-    [
-        "TotalMoves",  # Total de movimientos de todos los Roombas
-        "AvgBattery",  # Batería promedio de los Roombas
-        "DirtyPatches",  # Número total de celdas sucias
-    ],
-)
-
-page = SolaraViz(
-    model,
-    components=[space_component, plot_component],
-    model_params=model_params,
-    name="Random Model",
-)
+def initial_params():
+    """
+    Regresa los valores iniciales de model_params listos para crear el modelo.
+    """
+    return {name: param["value"] for name, param in model_params.items()}
+
+def make_model():
+    """
+    Create the model using the initial parameters from the settings
+    """
+    return RandomModel(**initial_params())
+
+def __getattr__(name):
+    # `solara run app.py` busca Page; la visualización se importa solo en ese momento
+    if name in ("Page", "page"):
+        from dashboard import Page
+        return Page
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,206 @@
+# Visualización del RandomModel. app.py importa este módulo hasta que Solara pide la página,
+# así importar app.py (o random_agents) no carga Solara, matplotlib ni mesa.visualization.
+from random_agents.agent import RoombaRobot, ObstacleAgent, DirtPatch, ChargingStation # Importar las clases necesarias de nuestros agentes
+from random_agents.background import SimulationWorker, ReplayWorker
+from random_agents.action_log import LogReplay
+from app import model_params, make_model
+
+import time
+
+from mesa.visualization import (
+    SolaraViz,
+    make_space_component,
+    make_plot_component
+)
+
+from mesa.visualization.components import AgentPortrayalStyle
+from mesa.visualization.utils import update_counter
+
+import solara
+from matplotlib.colors import ListedColormap
+from matplotlib.figure import Figure
+
+# Dibujar el grid como imagen (un solo imshow) en lugar de un marcador por agente.
+# Con False se usa la vista de Mesa con random_portrayal.
+# La vista de Mesa solo dibuja la suciedad y los obstáculos que tienen agente, con
+# use_property_layers=True solo la vista raster (que lee las capas) los muestra.
+USE_RASTER = True
+
+# Con True la simulación corre en un hilo de fondo y la página solo muestra sus snapshots
+BACKGROUND_MODE = False
+FRAME_BUFFER = 1000  # Snapshots que se guardan para poder regresar o adelantar
+
+# Ruta de una bitácora de acciones (.npz de ActionLog.save) para revisar esa corrida sin simularla
+REPLAY_LOG = None
+REPLAY_EVERY = 1  # Pasos entre cuadros de la repetición
+
+# Colores de los códigos de RandomModel.grid_raster(): libre, sucia, obstáculo, estación
+RASTER_COLORS = ListedColormap(["white", "brown", "gray", "blue"])
+
+def random_portrayal(agent):
+    if agent is None:
+        return
+
+    portrayal = AgentPortrayalStyle(
+        size=50,
+        marker="o",
+    )
+
+    if isinstance(agent, ChargingStation):
+        portrayal.color = "blue"
+        portrayal.marker = "s"
+        portrayal.size = 80
+    elif isinstance(agent, RoombaRobot):
+        if agent.state != "DEAD":
+            portrayal.color = "red"
+            portrayal.size = 70
+        else:
+            portrayal.color = "black"
+            portrayal.size = 70
+    elif isinstance(agent, ObstacleAgent):
+        portrayal.color = "gray"
+        portrayal.marker = "s"
+        portrayal.size = 100
+    elif isinstance(agent, DirtPatch):
+        if agent.dirty:
+            portrayal.color = "brown" # sucia
+            portrayal.size = 50
+        else:
+            portrayal.color = "white" # limpia
+            portrayal.size = 50
+
+    return portrayal
+
+def post_process(ax):
+    ax.set_aspect("equal")
+
+def draw_snapshot(snapshot, post_process=None):
+    """
+    Dibuja obstáculos, suciedad y estaciones con un solo imshow y encima solo los Roombas.
+    El costo de redibujar no depende de cuántos agentes fijos haya.
+    """
+    fig = Figure()
+    ax = fig.add_subplot()
+
+    # El raster está indexado [x, y], se transpone para que x sea la columna
+    ax.imshow(
+        snapshot["raster"].T,
+        origin="lower",
+        cmap=RASTER_COLORS,
+        vmin=0,
+        vmax=3,
+        interpolation="nearest",
+    )
+
+    # Los Roombas son los únicos agentes que se dibujan como marcadores
+    xs = [x for x, _, _ in snapshot["robots"]]
+    ys = [y for _, y, _ in snapshot["robots"]]
+    colors = ["black" if state == "DEAD" else "red" for _, _, state in snapshot["robots"]]
+    ax.scatter(xs, ys, c=colors, s=70, marker="o")
+
+    if post_process is not None:
+        post_process(ax)
+
+    solara.FigureMatplotlib(fig, format="png", bbox_inches="tight")
+
+@solara.component
+def RasterSpace(model, post_process=None):
+    update_counter.get()
+    draw_snapshot(model.snapshot(), post_process=post_process)
+
+def make_raster_component(post_process=None):
+    def MakeRasterSpace(model):
+        return RasterSpace(model, post_process=post_process)
+
+    return MakeRasterSpace
+
+if USE_RASTER:
+    space_component = make_raster_component(post_process=post_process)
+else:
+    space_component = make_space_component(
+            random_portrayal,
+            draw_grid = False,
+            post_process=post_process
+    )
+
+plot_component = make_plot_component(
+    [
+        "TotalMoves",  # Total de movimientos de todos los Roombas
+        "AvgBattery",  # Batería promedio de los Roombas
+        "DirtyPatches",  # Número total de celdas sucias
+    ],
+)
+
+@solara.component
+def BackgroundPage(model):
+    """
+    Página para el modo en segundo plano: el modelo avanza en un SimulationWorker y aquí solo
+    se dibujan sus snapshots al ritmo de la página, saltando los cuadros intermedios.
+    Con "En vivo" apagado se puede recorrer el buffer con el slider.
+    """
+    worker = solara.use_memo(lambda: SimulationWorker(model, buffer_size=FRAME_BUFFER), [])
+    solara.use_effect(lambda: worker.stop, [])  # Detener el hilo al cerrar o recargar la página
+    FramesPage(worker, title="Simulación en segundo plano")
+
+@solara.component
+def ReplayPage():
+    """
+    Página para revisar una corrida guardada en REPLAY_LOG: los cuadros se reconstruyen de la
+    bitácora de acciones con LogReplay, sin correr el modelo.
+    """
+    worker = solara.use_memo(lambda: ReplayWorker(LogReplay(REPLAY_LOG).frames(every=REPLAY_EVERY)), [])
+    FramesPage(worker, title="Repetición")
+
+@solara.component
+def FramesPage(worker, title):
+    """
+    Dibuja los snapshots de un SimulationWorker o un ReplayWorker al ritmo de la página.
+    """
+    fps = solara.use_reactive(10)
+    live = solara.use_reactive(True)
+    index = solara.use_reactive(0)
+    _, set_tick = solara.use_state(0)
+
+    def refresh(cancel):
+        # Redibujar a un ritmo fijo sin importar qué tan rápido avanza la simulación
+        while not cancel.is_set():
+            time.sleep(1 / fps.value)
+            set_tick(lambda tick: tick + 1)
+
+    solara.use_thread(refresh, dependencies=[])
+
+    frames = len(worker)
+    snapshot = worker.latest() if live.value else worker.frame(index.value)
+
+    with solara.Sidebar():
+        with solara.Card(title):
+            solara.Button(
+                "❚❚" if worker.playing else "▶",
+                color="primary",
+                on_click=lambda: worker.pause() if worker.playing else worker.start(),
+            )
+            solara.SliderInt("Cuadros por segundo", value=fps, min=1, max=30)
+            solara.Checkbox(label="En vivo", value=live)
+            solara.SliderInt("Cuadro", value=index, min=0, max=max(0, frames - 1), disabled=live.value)
+            solara.Text(f"Paso {snapshot['step']} ({frames} cuadros en el buffer)")
+
+    draw_snapshot(snapshot, post_process=post_process)
+
+@solara.component
+def Page():
+    if REPLAY_LOG is not None:
+        ReplayPage()
+        return
+
+    # El primer modelo se construye hasta que la página se dibuja por primera vez
+    model = solara.use_memo(make_model, [])
+
+    if BACKGROUND_MODE:
+        BackgroundPage(model)
+    else:
+        SolaraViz(
+            model,
+            components=[space_component, plot_component],
+            model_params=model_params,
+            name="Random Model",
+        )
@@ -0,0 +1,241 @@
+import json
+from array import array
+
+import numpy as np
+
+from .agent import ChargingStation
+
+# Bitácora compacta de acciones para revisar una corrida sin volver a simularla.
+# Con record_actions=True el modelo guarda al empezar una foto del grid (obstáculos, suciedad,
+# estaciones) y de los Roombas (posición, batería, estado), y luego una entrada por acción:
+# moverse, limpiar, recargar o cambiar de estado. Cada entrada es un entero de 64 bits:
+#
+#     Roomba (16 bits) | acción (8 bits) | celda y * width + x, o el estado (40 bits)
+#
+# más el número de entradas acumuladas al terminar cada paso. Un millón de pasos con 10 Roombas
+# son unas decenas de MB antes de comprimir.
+#
+# La batería no se guarda: moverse y limpiar cuestan 1 y cada recarga suma 5 (como en
+# RoombaRobot), así que LogReplay la reconstruye junto con las posiciones, la suciedad y los
+# estados con operaciones de NumPy sobre las entradas, sin correr nada de la lógica de los agentes.
+
+MOVE, CLEAN, RECHARGE, STATE = range(4)
+COSTO = {MOVE: -1, CLEAN: -1, RECHARGE: 5} # Cambio de batería de cada acción
+
+ESTADOS = ["EXPLORING", "CHARGING", "CRITICAL", "DEAD"]
+
+ROBOT_SHIFT = 48
+ACTION_SHIFT = 40
+PAYLOAD_MASK = (1 << ACTION_SHIFT) - 1
+
+
+class ActionLog:
+    """
+    Bitácora de acciones de los Roombas de un modelo, desde el momento en que se crea.
+    Args:
+        model: RandomModel ya construido (con sus Roombas, estaciones y suciedad)
+    """
+    def __init__(self, model):
+        self.width = model.width
+        self.start_step = model.current_step
+        self.ids = {robot: i for i, robot in enumerate(model.roombas)}
+        self.states = [robot.state for robot in model.roombas]
+        self.records = array("Q")
+        self.step_ends = array("Q")  # Entradas acumuladas al terminar cada paso
+        stations = model.agents_by_type.get(ChargingStation, [])
+        self.header = {
+            "width": model.width,
+            "height": model.height,
+            "start_step": model.current_step,
+            "obstacles": model.grid.obstacle.data.copy(),
+            "dirty": model.grid.dirty.data.copy(),
+            "stations": np.array([s.cell.coordinate for s in stations], dtype=np.int32).reshape(-1, 2),
+            "positions": np.array([r.cell.coordinate for r in model.roombas], dtype=np.int32).reshape(-1, 2),
+            "battery": np.array([r.battery for r in model.roombas], dtype=np.int32),
+            "state": np.array([ESTADOS.index(r.state) for r in model.roombas], dtype=np.int8),
+        }
+
+    def __len__(self):
+        return len(self.step_ends)
+
+    def record(self, robot, action, payload):
+        robot_id = self.ids.get(robot)
+        if robot_id is not None:
+            self.records.append((robot_id << ROBOT_SHIFT) | (action << ACTION_SHIFT) | payload)
+
+    def moved(self, robot, coord):
+        self.record(robot, MOVE, coord[1] * self.width + coord[0])
+
+    def cleaned(self, robot, coord):
+        self.record(robot, CLEAN, coord[1] * self.width + coord[0])
+
+    def recharged(self, robot):
+        self.record(robot, RECHARGE, 0)
+
+    def end_step(self, robots):
+        """
+        Cierra el paso: agrega los cambios de estado de los Roombas y marca dónde termina.
+        """
+        states = self.states
+        for robot in robots:
+            i = self.ids.get(robot)
+            if i is not None and states[i] != robot.state:
+                states[i] = robot.state
+                self.record(robot, STATE, ESTADOS.index(robot.state))
+        self.step_ends.append(len(self.records))
+
+    def save(self, path):
+        """
+        Guarda la bitácora en un .npz comprimido.
+        """
+        header = dict(self.header)
+        meta = {name: header.pop(name) for name in ("width", "height", "start_step")}
+        np.savez_compressed(
+            path,
+            records=np.frombuffer(self.records, dtype=np.uint64),
+            step_ends=np.frombuffer(self.step_ends, dtype=np.uint64),
+            obstacles=np.packbits(header.pop("obstacles")),
+            dirty=np.packbits(header.pop("dirty")),
+            meta=np.array(json.dumps(meta)),
+            **header,
+        )
+
+
+class LogReplay:
+    """
+    Reconstruye posiciones, suciedad, batería y estados de una corrida a partir de su bitácora.
+    Args:
+        source: ActionLog o ruta de un .npz guardado con ActionLog.save
+    """
+    def __init__(self, source):
+        if isinstance(source, ActionLog):
+            header = dict(source.header)
+            self.records = np.frombuffer(source.records, dtype=np.uint64).copy()
+            self.step_ends = np.frombuffer(source.step_ends, dtype=np.uint64).astype(np.int64)
+        else:
+            with np.load(source) as data:
+                header = json.loads(str(data["meta"]))
+                size = header["width"] * header["height"]
+                shape = (header["width"], header["height"])
+                header["obstacles"] = np.unpackbits(data["obstacles"], count=size).reshape(shape).astype(bool)
+                header["dirty"] = np.unpackbits(data["dirty"], count=size).reshape(shape).astype(bool)
+                for name in ("stations", "positions", "battery", "state"):
+                    header[name] = data[name]
+                self.records = data["records"]
+                self.step_ends = data["step_ends"].astype(np.int64)
+
+        self.width = header["width"]
+        self.height = header["height"]
+        self.start_step = header["start_step"]
+        self.obstacles = header["obstacles"]
+        self.initial_dirty = header["dirty"]
+        self.stations = header["stations"]
+        self.initial_positions = header["positions"]
+        self.initial_battery = header["battery"]
+        self.initial_state = header["state"]
+
+        self.robot = (self.records >> np.uint64(ROBOT_SHIFT)).astype(np.int64)
+        self.action = ((self.records >> np.uint64(ACTION_SHIFT)) & np.uint64(0xFF)).astype(np.int8)
+        self.payload = (self.records & np.uint64(PAYLOAD_MASK)).astype(np.int64)
+
+        delta = np.zeros(len(self.records), dtype=np.int64)
+        for action, change in COSTO.items():
+            delta[self.action == action] = change
+        self.delta = delta
+
+    def __len__(self):
+        return len(self.step_ends)
+
+    def _end(self, step):
+        """
+        Número de entradas hasta el final del paso step (start_step es el estado inicial).
+        """
+        k = step - self.start_step
+        if k <= 0:
+            return 0
+        return int(self.step_ends[min(k, len(self.step_ends)) - 1])
+
+    def _apply(self, current, begin, end):
+        """
+        Aplica a current (positions, battery, state, dirty) las entradas [begin, end), con
+        operaciones de NumPy: la última posición y el último estado de cada Roomba en el tramo,
+        la suma de sus cambios de batería y las celdas que se limpiaron.
+        """
+        positions, battery, state, dirty = current
+        robot, action, payload = self.robot[begin:end], self.action[begin:end], self.payload[begin:end]
+        n = len(positions)
+
+        for code, values in ((MOVE, None), (STATE, state)):
+            rows = np.nonzero(action == code)[0]
+            if not len(rows):
+                continue
+            last = np.full(n, -1)
+            np.maximum.at(last, robot[rows], rows)
+            changed = last >= 0
+            if values is None:
+                nodes = payload[last[changed]]
+                positions[changed, 0] = nodes % self.width
+                positions[changed, 1] = nodes // self.width
+            else:
+                values[changed] = payload[last[changed]]
+
+        # La batería nunca baja de 0: un Roomba sin batería muere y ya no actúa
+        battery += np.bincount(robot, weights=self.delta[begin:end], minlength=n).astype(battery.dtype)
+
+        cleaned = payload[action == CLEAN]
+        dirty[cleaned % self.width, cleaned // self.width] = False
+
+    def _initial(self):
+        return (
+            self.initial_positions.astype(np.int64),
+            self.initial_battery.astype(np.int64),
+            self.initial_state.copy(),
+            self.initial_dirty.copy(),
+        )
+
+    def _raster(self, dirty):
+        # Mismos códigos que RandomModel.grid_raster
+        raster = np.zeros((self.width, self.height), dtype=np.int8)
+        raster[dirty] = 1
+        raster[self.obstacles] = 2
+        for x, y in self.stations:
+            raster[x, y] = 3
+        return raster
+
+    def _snapshot(self, step, current):
+        positions, _, state, dirty = current
+        return {
+            "step": step,
+            "raster": self._raster(dirty),
+            "robots": [(int(x), int(y), ESTADOS[s]) for (x, y), s in zip(positions.tolist(), state.tolist())],
+        }
+
+    def state_at(self, step):
+        """
+        Estado al final de step: {"positions", "battery", "state", "dirty"} como arreglos.
+        Se calcula directo con las entradas hasta ese paso, sin recorrer los pasos anteriores.
+        """
+        current = self._initial()
+        self._apply(current, 0, self._end(step))
+        return dict(zip(("positions", "battery", "state", "dirty"), current))
+
+    def snapshot(self, step):
+        """
+        Foto del paso step con el mismo formato que RandomModel.snapshot().
+        """
+        current = self._initial()
+        self._apply(current, 0, self._end(step))
+        return self._snapshot(step, current)
+
+    def frames(self, every=1):
+        """
+        Snapshots desde el inicio hasta el último paso, uno cada 'every' pasos.
+        Avanza aplicando solo las entradas de cada tramo, sin reconstruir desde el principio.
+        """
+        current = self._initial()
+        begin = 0
+        for step in range(self.start_step, self.start_step + len(self.step_ends) + 1, every):
+            end = self._end(step)
+            self._apply(current, begin, end)
+            begin = end
+            yield self._snapshot(step, current)
@@ -1,6 +1,12 @@
 from mesa.discrete_space import CellAgent, FixedAgent
+from mesa.discrete_space.cell_agent import HasCell
 import heapq # Para la implementación del algoritmo de A*
 
+from .knowledge_map import KnowledgeMap, BIT_DIRECCION
+
+PASOS_POR_CARGA = 20  # Pasos que tarda una carga completa (100% a 5% por paso), para estimar la espera en fila
+ESPERA_RESERVADA = 3  # Pasos que un Roomba en espera reserva su celda por adelantado
+
 # Se crean las clases de los obstaculos y estaciones de carga
 
 class DirtPatch(FixedAgent):
@@ -12,6 +18,15 @@ class DirtPatch(FixedAgent):
         self.cell = cell
         self.dirty = dirty  # True = sucia, False = limpia
 
+    @property
+    def dirty(self):
+        # El estado vive en la capa "dirty" del grid
+        return bool(self.cell.dirty)
+
+    @dirty.setter
+    def dirty(self, value):
+        self.cell.dirty = value
+
     def step(self):
         # No hace nada por sí misma, solo espera a ser limpiada
         pass
@@ -47,36 +62,65 @@ class RoombaRobot(CellAgent):
     - Puede moverse, limpiar y recargar
     - Cambia de estado dependiendo de la batería, si está baja priorizará recargar sobre limpiar
     """
-    def __init__(self, model, cell, battery=100, low_battery_threshold=30):
+    def __init__(self, model, cell, battery=100, low_battery_threshold=30, sensor_radius=1):
         super().__init__(model)
         self.cell = cell
         self.battery = battery
         self.low_battery_threshold = low_battery_threshold
+        self.sensor_radius = sensor_radius  # Celdas que ve alrededor (1 = sus 8 vecinas)
         self.moves = 0  # Para estadísticas
         self.home_cell = cell  # Celda inicial del Roomba
         self.homepos = cell.coordinate
         self.state = "EXPLORING"  # EXPLORING, CHARGING, CRITICAL, DEAD. Empezamos limpiando y cambiaremos dependiendo de la batería
-        # Para el mapa interno del Roomba
-        self.known_cells = {cell.coordinate: cell} 
-        self.known_graph = {cell.coordinate: set()} 
-        # Saber cuáles celdas ha visitado
-        self.visited_positions = set()
-        self.visited_positions.add(cell.coordinate)
+        # Para el mapa interno del Roomba: celdas conocidas, aristas y celdas visitadas por nodo entero
+        self.map = KnowledgeMap(model.width, model.height, model.search_buffers)
+        self.map.add_node(self.map.node(cell.coordinate))
+        self.map.visit(cell.coordinate)
         # Para el camino actual hacia una celda objetivo
         self.current_path = []
+        # Recorrido boustrophedon de su franja, solo con exploration="coverage" en el modelo
+        self.coverage = None
+        # Camino a la celda sucia que le asignó la subasta, solo con allocation="market" en el modelo
+        self.target_path = []
 
         self.update_knowledge()
 
+    @property
+    def cell(self):
+        return self._mesa_cell
+
+    @cell.setter
+    def cell(self, cell):
+        """
+        Mueve al Roomba como cualquier CellAgent, actualiza el índice espacial del modelo y, si el
+        modelo guarda la bitácora de acciones, anota el movimiento.
+        """
+        old_cell = self._mesa_cell
+        HasCell.cell.fset(self, cell)
+        index = getattr(self.model, "robot_index", None)
+        if index is not None:
+            index.move(
+                self,
+                old_cell.coordinate if old_cell is not None else None,
+                cell.coordinate if cell is not None else None,
+            )
+        log = getattr(self.model, "action_log", None)
+        if log is not None and cell is not None:
+            log.moved(self, cell.coordinate)
+
     # Definimos getters para las acciones del Roomba, saber si cambiar de estado o limpiar una celda.
     
     def current_DirtyPatch(self):
         """
-        Regresa la celda de suciedad en la que está el Roomba, o None si no hay ninguna
+        Regresa la celda de suciedad en la que está el Roomba, o None si no hay ninguna.
+        Con capas (sin DirtPatch) regresa la celda del grid, que también tiene el atributo dirty.
         """
+        if not self.cell.dirty:
+            return None
         for agent in self.cell.agents:
-            if isinstance(agent, DirtPatch) and agent.dirty:
+            if isinstance(agent, DirtPatch):
                 return agent
-        return None
+        return self.cell
     
     def on_ChargingStation(self):
         """
@@ -91,9 +135,7 @@ class RoombaRobot(CellAgent):
         """
         Regresa las celdas vecinas que no tienen obstáculos para desplazarse
         """
-        return self.cell.neighborhood.select(
-        lambda cell: not any(isinstance(agent, ObstacleAgent) for agent in cell.agents)
-        )
+        return self.cell.neighborhood.select(lambda cell: not cell.obstacle)
     
     def get_known_stations(self):
         """
@@ -101,46 +143,32 @@ class RoombaRobot(CellAgent):
         que hay estaciones de carga.
         """
         stations = []
-        for coord, cell in self.known_cells.items():
-            if any(isinstance(a, ChargingStation) for a in cell.agents):
-                stations.append(coord)
+        for station in self.model.agents_by_type.get(ChargingStation, []):
+            if station.cell.coordinate in self.map:
+                stations.append(station.cell.coordinate)
         return stations
     
-    def get_closest_station_path(self):
+    def station_field(self):
         """
-        Usa A* para encontrar el camino más corto a la
-        estación de carga conocida más cercana.
-        Regresa la lista de coordenadas o None si no hay camino.
+        Campo de distancias del mapa interno a las estaciones conocidas.
+        Se repara de forma incremental, no se vuelve a buscar desde cero en cada paso.
         """
-        current_coord = self.cell.coordinate
-        stations = self.get_known_stations() # A partir de la coordenada actual, buscar estaciones conocidas
-
-        best_path = None
-
-        for goal in stations:  # Recorrer cada estación conocida
-            if goal not in self.known_graph: 
-                continue
-
-            path = self.a_star(current_coord, goal)
-            if path is None or len(path) < 1:
-                continue
+        field = self.map.distance_field()
+        for coord in self.get_known_stations():
+            field.add_source(self.map.node(coord))
+        return field
 
-            if best_path is None or len(path) < len(best_path):
-                best_path = path
-
-        return best_path
-    
     def is_Battery_Low(self):
         """
         Regresa True si la batería está baja, False en caso contrario
         """
-        # Buscar en el mapa interno el camino a la estación de carga más cercana, sea la de el o no
-        path = self.get_closest_station_path()
-        if path is None:
+        # Buscar en el mapa interno la distancia a la estación de carga más cercana, sea la de el o no
+        dist = self.station_field().distance(self.map.node(self.cell.coordinate))
+        if dist is None:
             # si no hay camino conocido, ser conservador
             return self.battery <= self.low_battery_threshold
 
-        dist_home = len(path)  # Pasos necesarios para llegar a la estación
+        dist_home = dist + 1  # Celdas del camino a la estación, contando la actual
         margen = 1 # Margen de bateria que se quiere tener al llegar, no llegar justo a 0
         return self.battery <= (dist_home + margen)
     
@@ -157,105 +185,121 @@ class RoombaRobot(CellAgent):
         Actualiza el grafo interno con:
         - la celda actual
         - sus vecinos libres de obstáculos
+        - los vecinos que son obstáculo
+        Con sensor_radius mayor a 1 agrega de golpe toda la ventana que ve (ver reveal_window).
+        Con subasta, además le avisa al coordinador de la flota de la suciedad que ve.
         """
-        current_coord = self.cell.coordinate
+        coordinator = getattr(self.model, "coordinator", None)
+        if coordinator is not None:
+            coordinator.observe(self)
 
-        # Aseguramos que la celda actual está en el diccionario
-        if current_coord not in self.known_cells:
-            self.known_cells[current_coord] = self.cell
+        if self.sensor_radius > 1:
+            self.reveal_window()
+            return
 
-        if current_coord not in self.known_graph:
-            self.known_graph[current_coord] = set()
+        x, y = self.cell.coordinate
+        knowledge = self.map
+        u = knowledge.node((x, y))
 
-        neighbors = self.neighbors_Without_Obstacles()
-        for n_cell in neighbors:
-            n_coord = n_cell.coordinate
-            # Guardar celda y aristas en ambos sentidos
-            if n_coord not in self.known_cells:
-                self.known_cells[n_coord] = n_cell
+        # Aseguramos que la celda actual está en el mapa
+        knowledge.add_node(u)
 
-            if n_coord not in self.known_graph:
-                self.known_graph[n_coord] = set()
+        for n_cell in self.cell.neighborhood:
+            nx, ny = n_cell.coordinate
+            if n_cell.obstacle:
+                knowledge.block((nx, ny))
+                continue
+            # Guardar celda y aristas en ambos sentidos
+            knowledge.add_edge(u, knowledge.node((nx, ny)), BIT_DIRECCION[(nx - x, ny - y)])
 
-            self.known_graph[current_coord].add(n_coord)
-            self.known_graph[n_coord].add(current_coord)
+    def reveal_window(self):
+        """
+        Agrega al mapa interno la ventana de (2r + 1) x (2r + 1) celdas alrededor del Roomba,
+        leída directo de la capa "obstacle" del grid: celdas libres, obstáculos y las aristas
+        entre todas las celdas libres vecinas que ve, no solo las que salen de su celda.
+        """
+        r = self.sensor_radius
+        x, y = self.cell.coordinate
+        x0, x1 = max(0, x - r), min(self.model.width, x + r + 1)
+        y0, y1 = max(0, y - r), min(self.model.height, y + r + 1)
+        obstacle = self.model.grid.obstacle.data[x0:x1, y0:y1].T  # La capa es [x, y], el mapa [y, x]
+        self.map.reveal(x0, y0, ~obstacle)
 
     # Si el roomba se encuentra con otro puede intercambiar información de su mapa interno
     def merge_knowledge_from(self, other):
         """
         Fusiona el mapa conocido de 'other' dentro del del propio robot.
+        La llama RandomModel.share_knowledge con los grupos de Roombas que se encontraron.
         Esta acción no consume batería.
         """
-        # Celdas conocidas
-        for coord, cell in other.known_cells.items():
-            if coord not in self.known_cells:
-                self.known_cells[coord] = cell
-
-        # Grafo conocido
-        for coord, neighbors in other.known_graph.items():
-            if coord not in self.known_graph:
-                self.known_graph[coord] = set()
-            self.known_graph[coord] |= neighbors  # Une los conjuntos de ambos robots
-
-    def share_knowledge(self):
-        """
-        Comparte conocimiento con otros Roombas que estén en los vecinos de uno.
-        Esta acción no consume batería.
-        """
-        # Ver todos los agentes vecinos
-        for cell in self.neighbors_Without_Obstacles():
-            for agent in cell.agents:
-                if isinstance(agent, RoombaRobot) and agent is not self:
-                    # Intercambiar conocimiento
-                    self.merge_knowledge_from(agent)
-                    agent.merge_knowledge_from(self)
+        self.map.merge(other.map)  # Une las celdas conocidas y aristas de ambos robots
 
     # Para encontrar el camino más optimo a la estación de recarga.
     def a_star(self, start, goal):
-        dist = {node: float("inf") for node in self.known_graph} # Distancia inicial infinita hacia cada nodo
-        prev = {node: None for node in self.known_graph} # Nodo previo en el camino más corto
-        dist[start] = 0 # Distancia al nodo inicial es 0
+        """
+        Camino más corto de start a goal sobre el mapa conocido (costo uniforme 1 por paso).
+        Regresa la lista de coordenadas o None si no hay camino.
+        """
+        return self.nearest_path(start, [goal])
 
-        heap = [(0, start)]  # (distancia, nodo)
+    def nearest_path(self, start, goals):
+        """
+        Camino más corto hacia la más cercana de varias celdas objetivo, con una sola búsqueda.
+        Equivale a correr a_star hacia cada objetivo y quedarse con el camino más corto.
+        Regresa la lista de coordenadas o None si ningún objetivo es alcanzable.
+        """
+        knowledge = self.map
+        path = knowledge.nearest_path(knowledge.node(start), {knowledge.node(goal) for goal in goals})
+        if path is None:
+            return None
+        return [knowledge.coord(node) for node in path]
 
-        while heap: # mientras haya nodos por explorar
-            current_dist, u = heapq.heappop(heap)
-            if current_dist > dist[u]:
-                continue
-            if u == goal:
-                break
+    # Métodos auxiliares para la suciedad asignada por la subasta del modelo
 
-            for v in self.known_graph[u]:
-                alt = current_dist + 1  # costo uniforme 1 por paso
-                if alt < dist[v]:
-                    dist[v] = alt
-                    prev[v] = u
-                    heapq.heappush(heap, (alt, v))
+    def assigned_target(self):
+        """
+        Regresa la celda sucia que le asignó el coordinador de la flota, o None.
+        """
+        coordinator = getattr(self.model, "coordinator", None)
+        if coordinator is None:
+            return None
+        return coordinator.targets.get(self)
 
-        if dist[goal] == float("inf"):
+    def next_target_step(self):
+        """
+        Siguiente celda del camino a su celda sucia asignada. Sigue el camino que se calculó en la
+        subasta y solo vuelve a planear si se desvió (por ejemplo, a limpiar una vecina).
+        Si ya no la alcanza la suelta para que vuelva a subasta. Regresa None si no tiene objetivo.
+        """
+        target = self.assigned_target()
+        if target is None:
             return None
+        x, y = self.cell.coordinate
+        path = self.target_path
+        if not path or max(abs(path[0][0] - x), abs(path[0][1] - y)) != 1:
+            path = self.nearest_path((x, y), [target])
+            if path is None or len(path) < 2:
+                self.drop_target()
+                return None
+            path = path[1:]
+        self.target_path = path[1:]
+        return path[0]
+
+    def drop_target(self):
+        """
+        Suelta la celda sucia asignada, si tiene.
+        """
+        coordinator = getattr(self.model, "coordinator", None)
+        if coordinator is not None:
+            coordinator.release(self)
 
-        # Reconstruir el camino
-        path = []
-        node = goal
-        while node is not None:
-            path.append(node)
-            node = prev[node]
-        path.reverse()
-        return path
-    
     # Métodos auxiliares para las acciones del Roomba despues de recargarse
 
     def get_pending_positions(self):
         """
         Regresa una lista de coordenadas que el robot conoce pero que aún no ha visitado.
         """
-        pending = [
-            coord for coord in self.known_cells.keys()
-            if coord not in self.visited_positions
-            and coord in self.known_graph # Se revisa que esten en el grafo conocido
-        ]
-        return pending
+        return [self.map.coord(node) for node in self.map.pending_nodes()]
 
     # Definimos las acciones del Roomba: moverse, limpiar y recargar
         
@@ -263,48 +307,67 @@ class RoombaRobot(CellAgent):
         """
         Mueve al robot un paso hacia alguna celda pendiente por explorar si es que no hay celdas sucias en la vecindad,
         usando A*. Si no hay pendientes alcanzables, se mueve de manera aleatoria.
+        Con cobertura sistemática primero sigue el recorrido de su franja y al terminarlo explora como siempre.
         """
         neighbors = self.neighbors_Without_Obstacles()
-        dirty_cells = [cell for cell in neighbors if any(isinstance(a, DirtPatch) and a.dirty for a in cell.agents)]
+        dirty_cells = [cell for cell in neighbors if cell.dirty]
         
         # Prioriza moverse a celdas sucias en vecindad
         if dirty_cells:  
             next_cell = self.random.choice(dirty_cells)
             self.cell = next_cell
             self.moves += 1
-            self.visited_positions.add(next_cell.coordinate)
+            self.map.visit(next_cell.coordinate)
+            self.update_knowledge()
+            self.consume_Battery()
+            return
+
+        # Con subasta, ir a la celda sucia que le asignaron
+        next_coord = self.next_target_step()
+        if next_coord is not None:
+            self.cell = self.model.grid[next_coord]
+            self.moves += 1
+            self.map.visit(next_coord)
             self.update_knowledge()
             self.consume_Battery()
             return
 
+        # Con cobertura sistemática, seguir el recorrido de su franja mientras no lo termine
+        if self.coverage is not None and not self.coverage.finished:
+            next_coord = self.coverage.next_step(self.map, self.cell.coordinate)
+            if next_coord is not None:
+                self.cell = self.model.grid[next_coord]
+                self.moves += 1
+                self.map.visit(next_coord)
+                self.update_knowledge()
+                self.consume_Battery()
+                return
+
         # Si no hay celdas sucias en vecindad, buscar pendientes
-        unvisited = [cell for cell in neighbors if cell.coordinate not in self.visited_positions]
+        unvisited = [cell for cell in neighbors if not self.map.is_visited(cell.coordinate)]
         if unvisited:
             next_cell = self.random.choice(unvisited)
             self.cell = next_cell
             self.moves += 1
-            self.visited_positions.add(next_cell.coordinate)
+            self.map.visit(next_cell.coordinate)
             self.update_knowledge()
             self.consume_Battery()
             return
 
         # Si no hay celdas no visitadas en vecindad, usar A* para ir a la más cercana pendiente
-        pending_positions = self.get_pending_positions()
-        if pending_positions:
-            best_path = None
-            for goal in pending_positions:
-                path = self.a_star(self.cell.coordinate, goal)
-                if path is not None:  # Si hay un camino
-                    if best_path is None or len(path) < len(best_path):
-                        best_path = path
-
-            if best_path:
-                next_coord = best_path[1]  # Siguiente paso en el camino
-                next_cell = self.known_cells.get(next_coord)
+        knowledge = self.map
+        pending_nodes = knowledge.pending_nodes()
+        if pending_nodes:
+            # Con los mapas compartidos hay muchas pendientes, se buscan todas en una sola pasada
+            best_path = knowledge.nearest_path(knowledge.node(self.cell.coordinate), set(pending_nodes))
+
+            if best_path and len(best_path) > 1:
+                next_coord = knowledge.coord(best_path[1])  # Siguiente paso en el camino
+                next_cell = self.model.grid[next_coord]
                 if next_cell:
                     self.cell = next_cell
                     self.moves += 1
-                    self.visited_positions.add(next_cell.coordinate)
+                    self.map.visit(next_cell.coordinate)
                     self.update_knowledge()
                     self.consume_Battery()
                     return
@@ -323,7 +386,7 @@ class RoombaRobot(CellAgent):
         next_cell = self.random.choice(neighbors)
         self.cell = next_cell
         self.moves += 1
-        self.visited_positions.add(next_cell.coordinate)
+        self.map.visit(next_cell.coordinate)
         self.update_knowledge()
         self.consume_Battery()
     
@@ -337,6 +400,12 @@ class RoombaRobot(CellAgent):
             self.consume_Battery()  # Consumir batería al limpiar
             if hasattr(self.model, "cleaned_cells"):
                 self.model.cleaned_cells += 1  # Aumentar el contador de celdas limpiadas
+            coordinator = getattr(self.model, "coordinator", None)
+            if coordinator is not None:
+                coordinator.cleaned(self.cell.coordinate)
+            log = getattr(self.model, "action_log", None)
+            if log is not None:
+                log.cleaned(self, self.cell.coordinate)
 
     def recharge(self):
         """
@@ -344,45 +413,219 @@ class RoombaRobot(CellAgent):
         """
         if self.on_ChargingStation():
             self.battery = self.battery + 5  # Recarga parcial
+            log = getattr(self.model, "action_log", None)
+            if log is not None:
+                log.recharged(self)
+
+    def choose_station(self):
+        """
+        Escoge la estación conocida con menor costo: los pasos para llegar más la espera
+        estimada por los Roombas que ya están formados en ella. Solo considera las estaciones
+        a las que le alcanza la batería; si no le alcanza para ninguna, va a la más cercana.
+        Las distancias son las exactas por el mapa interno.
+        Regresa la coordenada de la estación o None si no conoce ninguna alcanzable.
+        """
+        table = self.model.reservations
+        knowledge = self.map
+
+        best_station = None
+        best_cost = None
+        closest_station = None
+        closest_len = None
+
+        stations = self.get_known_stations()
+        # Una sola búsqueda para todas las estaciones
+        distances = knowledge.distances(
+            knowledge.node(self.cell.coordinate), {knowledge.node(goal) for goal in stations}
+        )
+        for goal in stations:
+            dist = distances.get(knowledge.node(goal))
+            if dist is None:
+                continue
+            length = dist + 1  # Celdas del camino, contando la actual
+
+            if closest_len is None or length < closest_len:
+                closest_station = goal
+                closest_len = length
+
+            if length > self.battery:  # No le alcanza la batería para llegar con carga de sobra
+                continue
+
+            cost = length + table.queue_length(goal) * PASOS_POR_CARGA
+            if best_cost is None or cost < best_cost:
+                best_station = goal
+                best_cost = cost
+
+        return best_station if best_station is not None else closest_station
+
+    def cooperative_a_star(self, start, goal, start_time, max_depth=None):
+        """
+        A* en espacio-tiempo sobre el grafo conocido. Evita las celdas que otros Roombas
+        reservaron en la tabla del modelo y los cruces de frente; permite esperar en la celda.
+        start se ocupa en start_time y path[i] en start_time + i.
+        Regresa la lista de coordenadas o None si no hay camino dentro de max_depth pasos.
+        """
+        table = self.model.reservations
+
+        if max_depth is None:
+            base_path = self.a_star(start, goal)
+            if base_path is None:
+                return None
+            max_depth = 2 * len(base_path) + 10  # Margen para esperas y desvíos
+
+        knowledge = self.map
+        coord = knowledge.coord # La tabla de reservaciones usa coordenadas
+        edges, neighbor_offsets = knowledge.edges, knowledge.neighbor_offsets
+        goal_x, goal_y = goal
+        goal_node = knowledge.node(goal)
+        start_node = knowledge.node(start)
+
+        def heuristic(node): # Distancia de Chebyshev, admisible con movimiento en 8 direcciones
+            x, y = coord(node)
+            return max(abs(x - goal_x), abs(y - goal_y))
+
+        prev = {(start_node, 0): None} # Estado (nodo, pasos) -> estado previo
+        heap = [(heuristic(start_node), 0, start_node)]  # (f, pasos, nodo)
+
+        while heap:
+            _, g, u = heapq.heappop(heap)
+            if u == goal_node:
+                # Reconstruir el camino
+                path = []
+                state = (u, g)
+                while state is not None:
+                    path.append(coord(state[0]))
+                    state = prev[state]
+                path.reverse()
+                return path
+
+            if g >= max_depth:
+                continue
+
+            t_next = start_time + g + 1
+            u_coord = coord(u)
+            for off in neighbor_offsets[edges[u]] + (0,):  # Vecinos conocidos o esperar en la misma celda
+                v = u + off
+                state = (v, g + 1)
+                if state in prev:
+                    continue
+                v_coord = coord(v)
+                # La estación se controla con la fila, no con la tabla
+                if v != goal_node and table.is_reserved(v_coord, t_next, self):
+                    continue
+                if v != u and table.is_swap(u_coord, v_coord, t_next, self):
+                    continue
+                prev[state] = (u, g)
+                heapq.heappush(heap, (g + 1 + heuristic(v), g + 1, v))
+
+        return None
+
+    def plan_to_station(self, station):
+        """
+        Planea con A* cooperativo el camino a la estación y lo reserva en la tabla del modelo.
+        """
+        t = self.model.current_step
+        path = self.cooperative_a_star(self.cell.coordinate, station, t - 1)
+        if path is None:
+            self.current_path = []
+            return
+        self.model.reservations.reserve_path(self, path, t - 1)
+        self.current_path = path
+
+    def wait_in_place(self):
+        """
+        Se queda en su celda esperando turno y la reserva unos pasos para que los demás la rodeen.
+        No consume batería.
+        """
+        table = self.model.reservations
+        table.reserve_wait(self, self.cell.coordinate, self.model.current_step, ESPERA_RESERVADA)
+
+    def start_charging(self):
+        """
+        Cambia a CHARGING y marca la estación en la que está como ocupada.
+        """
+        self.state = "CHARGING"
+        # Una vez que el Roomba empieza a cargar, marcamos la estación como ocupada
+        for agent in self.cell.agents:
+            if isinstance(agent, ChargingStation):
+                agent.isOccupied = True  # Marca la estación como ocupada
+        self.current_path = []  # Limpiar camino actual
+        self.model.reservations.release(self)
+
+    def leave_reservations(self):
+        """
+        Libera las celdas reservadas y el lugar en la fila de estaciones.
+        """
+        self.model.reservations.release(self)
+        self.model.reservations.leave_queue(self)
+        self.current_path = []
 
     def move_to_Charge(self):
         """
-        Mueve al Roomba a su estación de carga más cercana usando A*.
+        Mueve al Roomba a la estación de carga con menor costo usando A* cooperativo.
+        El Roomba se forma en la fila de la estación y sigue su camino reservado; solo
+        vuelve a planear si su siguiente celda ya no está reservada para él.
         """
-        # Si ya está sobre una estación, cambiar a CHARGING
-        if self.on_ChargingStation():
-            self.state = "CHARGING"
-            # Una vez que el Roomba empieza a cargar, marcamos la estación como ocupada
-            for agent in self.cell.agents:
-                if isinstance(agent, ChargingStation):
-                    agent.isOccupied = True  # Marca la estación como ocupada
-            self.current_path = []  # Limpiar camino actual
+        table = self.model.reservations
+        t = self.model.current_step
+        current_coord = self.cell.coordinate
+        station = table.queued_station(self)
+
+        # Si ya está sobre una estación (la suya o una sin fila), cambiar a CHARGING cuando sea su turno
+        if self.on_ChargingStation() and station in (None, current_coord):
+            station = current_coord
+            if table.join_queue(station, self) == 0:
+                self.start_charging()
+            else:
+                self.wait_in_place()
             return
 
-        # Buscar el mejor camino a la estación más cercana conocida y libre
-        path = self.get_closest_station_path()
+        # Escoger estación y formarse en su fila una sola vez
+        if station is None:
+            station = self.choose_station()
+            if station is None:  # No conoce ninguna estación alcanzable
+                self.move_Random()
+                return
+            table.join_queue(station, self)
+            self.current_path = []
+
+        # Seguir el camino reservado mientras siga siendo válido
+        path = self.current_path
+        valid = (
+            len(path) >= 2
+            and path[0] == current_coord
+            and path[-1] == station
+            and (path[1] == station or table.owner(path[1], t) is self)
+        )
+        if not valid:
+            self.plan_to_station(station)
+            path = self.current_path
 
-        if path is None or len(path) < 2:  # No hay camino o ya estamos en la estación
+        if len(path) < 2:  # No hay camino a la estación, salir de la fila y moverse al azar
+            self.leave_reservations()
             self.move_Random()
             return
 
-        # Usamos el siguiente paso en el camino encontrado
         next_coord = path[1]
-        next_cell = self.known_cells.get(next_coord)
 
+        # La estación se ocupa por turnos, si no es su turno espera junto a ella
+        if next_coord == station and not table.is_turn(station, self):
+            self.wait_in_place()
+            return
+
+        # Esperar en la misma celda es parte del camino reservado
+        if next_coord == current_coord:
+            self.current_path = path[1:]
+            return
+
+        next_cell = self.model.grid[next_coord] if next_coord in self.map else None
         if next_cell is None:
+            self.leave_reservations()
             self.move_Random()
             return
 
-        # Verificar si la estación de carga está ocupada
-        for agent in next_cell.agents:
-            if isinstance(agent, ChargingStation):
-                if agent.isOccupied:  # Si la estación está ocupada busca otra estación, en caso de no conocer una, espera.
-                    self.get_known_stations().remove(next_coord)
-                    return
-
-        # Si la estación no está ocupada, el Roomba se mueve allí
         self.cell = next_cell
+        self.current_path = path[1:]
         self.moves += 1
         self.consume_Battery()
         self.update_knowledge()
@@ -393,14 +636,17 @@ class RoombaRobot(CellAgent):
         Determines the new direction it will take, and then moves
         """
         if (self.battery == 0): # Si la batería llega a 0, el Roomba muere
+            if self.state != "DEAD":
+                self.leave_reservations()  # Ya no ocupa lugar en filas ni celdas reservadas
+                self.drop_target()
             self.state = "DEAD"
-            pass
         
         if self.state == "EXPLORING":
             # Prioriza recargar si la batería está baja
             if self.is_Battery_Low():
                 self.state = "CRITICAL"
                 self.current_path = []  # Limpiar camino actual
+                self.drop_target()  # Su celda sucia vuelve a subasta
             else: # Sigue explorando y limpiando
                 dirt_patch = self.current_DirtyPatch()
                 if dirt_patch and dirt_patch.dirty:
@@ -414,15 +660,14 @@ class RoombaRobot(CellAgent):
                 for agent in self.cell.agents: # Cuando cambia a EXPLORING, liberar la estación de carga
                     if isinstance(agent, ChargingStation):
                         agent.isOccupied = False  # Marca la estación como no ocupada para ser ocupada en el futuro
+                self.leave_reservations()  # Ceder el turno al siguiente en la fila
             else:
                 self.recharge()
 
         elif self.state == "CRITICAL":
             self.move_to_Charge()
 
-        elif self.state != "DEAD":
-            # Compartir conocimiento con otros Roombas en vecindad
-            self.share_knowledge()
+        # El intercambio de conocimiento con otros Roombas lo hace el modelo una vez por paso
 
         elif self.state == "DEAD":
             pass  # No hace nada si está muerto
\ No newline at end of file
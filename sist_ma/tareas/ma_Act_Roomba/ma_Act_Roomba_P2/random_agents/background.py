@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+
+# Simulación en un hilo aparte para los dashboards.
+# El hilo avanza el modelo por su cuenta y guarda snapshots ligeros (model.snapshot())
+# en un buffer circular de tamaño fijo; la interfaz lee el buffer a su propio ritmo,
+# se puede saltar cuadros y moverse entre los snapshots que sigan guardados.
+#
+# Este archivo está copiado tal cual en game_of_life/ de ma_Act_AutomataCelular_P1 y _P2 y en
+# random_agents/ de ma_Act_Roomba_P2: cada actividad se corre sola desde su carpeta y no hay un
+# paquete común que puedan importar. Un cambio aquí se hace igual en las tres copias.
+
+
+class SimulationWorker:
+    """
+    Avanza un modelo en un hilo de fondo y guarda sus snapshots en un buffer circular.
+    Args:
+        model: Modelo con step(), running y snapshot()
+        buffer_size: Cuántos snapshots guardar, los más viejos se descartan
+        steps_per_frame: Pasos del modelo entre un snapshot y el siguiente
+        max_fps: Límite de snapshots por segundo, None para avanzar lo más rápido posible
+    """
+    def __init__(self, model, buffer_size=500, steps_per_frame=1, max_fps=None):
+        self.model = model
+        self.steps_per_frame = steps_per_frame
+        self.max_fps = max_fps
+        self.frames = deque(maxlen=buffer_size)
+        self.frames.append(model.snapshot())
+
+        self._lock = threading.Lock()
+        self._playing = threading.Event()  # Activo mientras el hilo debe avanzar el modelo
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def playing(self):
+        return self._playing.is_set()
+
+    def start(self):
+        """
+        Empieza (o reanuda) la simulación en el hilo de fondo.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._playing.set()
+
+    def pause(self):
+        self._playing.clear()
+
+    def stop(self):
+        """
+        Detiene el hilo de fondo; el buffer sigue disponible.
+        """
+        self._stopped.set()
+        self._playing.set()  # Despertar al hilo si estaba en pausa para que termine
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._playing.clear()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._playing.wait()
+            if self._stopped.is_set():
+                break
+            if not self.model.running:
+                self._playing.clear()  # La simulación terminó, esperar
+                continue
+
+            started = time.perf_counter()
+            for _ in range(self.steps_per_frame):
+                self.model.step()
+                if not self.model.running:
+                    break
+            snapshot = self.model.snapshot()
+            with self._lock:
+                self.frames.append(snapshot)
+
+            if self.max_fps:
+                time.sleep(max(0.0, 1 / self.max_fps - (time.perf_counter() - started)))
+
+    # Lectura del buffer desde la interfaz
+
+    def __len__(self):
+        with self._lock:
+            return len(self.frames)
+
+    def latest(self):
+        """
+        Regresa el snapshot más reciente.
+        """
+        with self._lock:
+            return self.frames[-1]
+
+    def frame(self, index):
+        """
+        Regresa el snapshot en la posición index del buffer (0 es el más viejo guardado).
+        """
+        with self._lock:
+            index = max(0, min(index, len(self.frames) - 1))
+            return self.frames[index]
+
+
+class ReplayWorker:
+    """
+    Misma interfaz que SimulationWorker pero con snapshots ya calculados (por ejemplo, una
+    trayectoria guardada en la caché de resultados); no corre ningún modelo.
+    """
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.playing = False
+
+    def start(self):
+        pass
+
+    def pause(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def __len__(self):
+        return len(self.frames)
+
+    def latest(self):
+        return self.frames[-1]
+
+    def frame(self, index):
+        index = max(0, min(index, len(self.frames) - 1))
+        return self.frames[index]
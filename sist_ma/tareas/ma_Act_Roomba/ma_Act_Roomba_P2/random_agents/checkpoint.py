@@ -0,0 +1,309 @@
+import json
+from multiprocessing import Pool
+
+import numpy as np
+
+from .agent import RoombaRobot, DirtPatch, ChargingStation
+from .knowledge_map import KnowledgeMap
+from .coverage import CoveragePlan
+from .action_log import ActionLog
+
+# Checkpoints compactos del RandomModel.
+# En lugar de guardar con pickle todo el grafo de objetos de Mesa (celdas, agentes, conjuntos),
+# se guarda el estado como arreglos de NumPy en un .npz:
+# - obstáculos y suciedad como mapas del tamaño del grid (las capas "obstacle" y "dirty")
+# - los Roombas como arreglos (posición, batería, movimientos, estado, ...)
+# - el mapa interno de cada Roomba como bitmaps (celdas conocidas, visitadas y aristas, con el bit i
+#   de una celda indicando una arista en knowledge_map.DIRECCIONES[i])
+# - el estado de los generadores aleatorios para que la simulación siga igual al restaurar
+
+ESTADOS = ["EXPLORING", "CHARGING", "CRITICAL", "DEAD"]
+
+
+def _coords(mask):
+    """
+    Regresa la lista de coordenadas (x, y) con True en el mapa booleano.
+    """
+    return [(int(x), int(y)) for x, y in zip(*np.nonzero(mask))]
+
+
+def save_checkpoint(model, path):
+    """
+    Guarda el estado del modelo en un archivo .npz comprimido.
+    """
+    width, height = model.width, model.height
+    roombas = model.roombas
+
+    obstacles = model.grid.obstacle.data.copy()
+
+    dirt = np.full((width, height), -1, dtype=np.int8)  # -1 sin parche, 0 limpio, 1 sucio
+    for patch in model.agents_by_type.get(DirtPatch, []):
+        dirt[patch.cell.coordinate] = 0
+    dirt[model.grid.dirty.data] = 1
+
+    stations = list(model.agents_by_type.get(ChargingStation, []))
+
+    # Mapas internos de cada Roomba como bitmaps
+    known = np.zeros((len(roombas), width, height), dtype=bool)
+    visited = np.zeros((len(roombas), width, height), dtype=bool)
+    blocked = np.zeros((len(roombas), width, height), dtype=bool)
+    edges = np.zeros((len(roombas), width, height), dtype=np.uint8)
+    for i, roomba in enumerate(roombas):
+        # El mapa del Roomba está indexado [y, x], el checkpoint [x, y]
+        known[i] = roomba.map.as_array(roomba.map.known).T
+        visited[i] = roomba.map.as_array(roomba.map.visited).T
+        edges[i] = roomba.map.as_array(roomba.map.edges).T
+        blocked[i] = roomba.map.as_array(roomba.map.blocked).T
+
+    index = {roomba: i for i, roomba in enumerate(roombas)}
+    table = model.reservations
+    version, mt_state, gauss_next = model.random.getstate()
+
+    meta = {
+        "params": {
+            "num_agents": model.num_agents,
+            "width": width,
+            "height": height,
+            "percent_dirty": model.percent_dirty,
+            "percent_obstacles": model.percent_obstacles,
+            "max_steps": model.max_steps,
+            "seed": model.seed,
+            "use_property_layers": model.use_property_layers,
+            "exploration": model.exploration,
+            "sensor_radius": model.sensor_radius,
+            "allocation": model.allocation,
+            "collect_every": model.collect_every,
+            "record_actions": model.action_log is not None,
+            "collect_dir": None if model.collect_dir is None else str(model.collect_dir),
+        },
+        "current_step": model.current_step,
+        "steps": model.steps,
+        "running": model.running,
+        "initial_dirty_cells": model.initial_dirty_cells,
+        "cleaned_cells": model.cleaned_cells,
+        "random_version": version,
+        "random_gauss": gauss_next,
+        "rng_state": model.rng.bit_generator.state,
+        "paths": [[list(c) for c in roomba.current_path] for roomba in roombas],
+        "coverage": [
+            None if roomba.coverage is None else {
+                "waypoints": [list(c) for c in roomba.coverage.waypoints],
+                "path": [list(c) for c in roomba.coverage.path],
+                "replans": roomba.coverage.replans,
+            }
+            for roomba in roombas
+        ],
+        "market": None if model.coordinator is None else {
+            "dirt": [list(c) for c in model.coordinator.dirt],
+            "targets": [[index[robot], list(c)] for robot, c in model.coordinator.targets.items()],
+            "paths": [[list(c) for c in roomba.target_path] for roomba in roombas],
+            "awarded": model.coordinator.awarded,
+        },
+        "reservations": [
+            [list(coord), t, index[agent]] for coord, t, agent in table.entries()
+        ],
+        "queues": [
+            [list(station), [index[agent] for agent in queue]]
+            for station, queue in table.queues()
+        ],
+        "model_vars": model.datacollector.model_vars,
+        "collected_steps": model.datacollector.sampled_steps().tolist(),
+        "flushed_chunks": model.datacollector.flushed,
+    }
+
+    np.savez_compressed(
+        path,
+        obstacles=np.packbits(obstacles),
+        dirt=dirt,
+        stations=np.array([s.cell.coordinate for s in stations], dtype=np.int32).reshape(-1, 2),
+        station_occupied=np.array([s.isOccupied for s in stations], dtype=bool),
+        robot_pos=np.array([r.cell.coordinate for r in roombas], dtype=np.int32).reshape(-1, 2),
+        robot_home=np.array([r.homepos for r in roombas], dtype=np.int32).reshape(-1, 2),
+        robot_battery=np.array([r.battery for r in roombas], dtype=np.int32),
+        robot_threshold=np.array([r.low_battery_threshold for r in roombas], dtype=np.int32),
+        robot_sensor=np.array([r.sensor_radius for r in roombas], dtype=np.int32),
+        robot_moves=np.array([r.moves for r in roombas], dtype=np.int64),
+        robot_state=np.array([ESTADOS.index(r.state) for r in roombas], dtype=np.int8),
+        known=np.packbits(known),
+        visited=np.packbits(visited),
+        blocked=np.packbits(blocked),
+        edges=edges,
+        random_state=np.array(mt_state, dtype=np.uint32),
+        meta=np.array(json.dumps(meta)),
+    )
+
+
+def load_checkpoint(path, model_cls=None):
+    """
+    Reconstruye un RandomModel a partir de un checkpoint guardado con save_checkpoint.
+    La simulación continúa exactamente donde se quedó.
+    """
+    if model_cls is None:
+        from .model import RandomModel as model_cls
+
+    data = np.load(path)
+    meta = json.loads(str(data["meta"]))
+    params = meta["params"]
+    width, height = params["width"], params["height"]
+    n_robots = len(data["robot_pos"])
+
+    # Modelo vacío: solo crea el borde, lo demás se coloca desde los arreglos
+    model = model_cls(
+        num_agents=0,
+        width=width,
+        height=height,
+        percent_dirty=0,
+        percent_obstacles=0,
+        max_steps=params["max_steps"],
+        seed=params["seed"],
+        use_property_layers=params.get("use_property_layers", False),
+        exploration=params.get("exploration", "random"),
+        sensor_radius=params.get("sensor_radius", 1),
+        allocation=params.get("allocation", "local"),
+        collect_every=params.get("collect_every", 1),
+        collect_dir=params.get("collect_dir"),
+        record_actions=params.get("record_actions", False),
+    )
+    model.num_agents = params["num_agents"]
+    model.percent_dirty = params["percent_dirty"]
+    model.percent_obstacles = params["percent_obstacles"]
+
+    obstacles = np.unpackbits(data["obstacles"], count=width * height).reshape(width, height).astype(bool)
+    border = model.grid.obstacle.data.copy()
+    for coord in _coords(obstacles & ~border):
+        model.add_obstacle(model.grid[coord])
+
+    dirt = data["dirt"]
+    for coord in _coords(dirt >= 0):
+        if model.use_property_layers:
+            model.grid[coord].dirty = bool(dirt[coord] == 1)
+        else:
+            DirtPatch(model, model.grid[coord], dirty=bool(dirt[coord] == 1))
+
+    for coord, occupied in zip(data["stations"], data["station_occupied"]):
+        station = ChargingStation(model, cell=model.grid[tuple(int(c) for c in coord)])
+        station.isOccupied = bool(occupied)
+
+    known = np.unpackbits(data["known"], count=n_robots * width * height).reshape(n_robots, width, height)
+    visited = np.unpackbits(data["visited"], count=n_robots * width * height).reshape(n_robots, width, height)
+    edges = data["edges"]
+    if "blocked" in data.files:
+        blocked = np.unpackbits(data["blocked"], count=n_robots * width * height).reshape(n_robots, width, height)
+    else: # Checkpoints anteriores no guardaban los obstáculos vistos
+        blocked = np.zeros((n_robots, width, height), dtype=np.uint8)
+
+    for i in range(n_robots):
+        pos = tuple(int(c) for c in data["robot_pos"][i])
+        roomba = RoombaRobot(
+            model=model,
+            cell=model.grid[pos],
+            battery=int(data["robot_battery"][i]),
+            low_battery_threshold=int(data["robot_threshold"][i]),
+            sensor_radius=int(data["robot_sensor"][i]) if "robot_sensor" in data.files else 1,
+        )
+        roomba.homepos = tuple(int(c) for c in data["robot_home"][i])
+        roomba.home_cell = model.grid[roomba.homepos]
+        roomba.moves = int(data["robot_moves"][i])
+        roomba.state = ESTADOS[data["robot_state"][i]]
+        roomba.current_path = [tuple(c) for c in meta["paths"][i]]
+
+        # Reconstruir el mapa interno desde los bitmaps
+        roomba.map = KnowledgeMap(width, height, model.search_buffers)
+        roomba.map.as_array(roomba.map.known)[:] = known[i].T
+        roomba.map.as_array(roomba.map.visited)[:] = visited[i].T
+        roomba.map.as_array(roomba.map.edges)[:] = edges[i].T
+        roomba.map.as_array(roomba.map.blocked)[:] = blocked[i].T
+
+        coverage = meta.get("coverage", [None] * n_robots)[i]
+        if coverage is not None:
+            roomba.coverage = CoveragePlan([tuple(c) for c in coverage["waypoints"]])
+            roomba.coverage.path = [tuple(c) for c in coverage["path"]]
+            roomba.coverage.replans = coverage["replans"]
+        model.roombas.append(roomba)
+
+    # Suciedad conocida y asignaciones de la subasta
+    market = meta.get("market")
+    if model.coordinator is not None and market is not None:
+        coordinator = model.coordinator
+        coordinator.dirt = type(coordinator.dirt)()
+        for coord in market["dirt"]:
+            coordinator.dirt.add(tuple(coord))
+        for i, coord in market["targets"]:
+            coordinator.targets[model.roombas[i]] = tuple(coord)
+            coordinator.owners[tuple(coord)] = model.roombas[i]
+        for roomba, path in zip(model.roombas, market["paths"]):
+            roomba.target_path = [tuple(c) for c in path]
+        coordinator.awarded = market["awarded"]
+
+    # Reservaciones y filas de las estaciones
+    table = model.reservations
+    table.restore((tuple(coord), t, model.roombas[i]) for coord, t, i in meta["reservations"])
+    for station, queue in meta["queues"]:
+        for i in queue:
+            table.join_queue(tuple(station), model.roombas[i])
+
+    model.current_step = meta["current_step"]
+    model.steps = meta["steps"]
+    model.running = meta["running"]
+    model.initial_dirty_cells = meta["initial_dirty_cells"]
+    model.cleaned_cells = meta["cleaned_cells"]
+    model.datacollector.restore(
+        meta["model_vars"], meta.get("collected_steps"), meta.get("flushed_chunks", 0)
+    )
+
+    # Generadores aleatorios al final, construir el modelo vacío consumió números
+    model.random.setstate(
+        (meta["random_version"], tuple(int(v) for v in data["random_state"]), meta["random_gauss"])
+    )
+    model.rng.bit_generator.state = meta["rng_state"]
+
+    # La bitácora de acciones del modelo restaurado empieza en este paso
+    if model.action_log is not None:
+        model.action_log = ActionLog(model)
+    return model
+
+
+def summary(model):
+    """
+    Resumen de la corrida, el mismo que se imprime al terminar la simulación.
+    """
+    dirt_left = model.dirt_left()
+    return {
+        "steps": model.current_step,
+        "cleaned": model.initial_dirty_cells - dirt_left,
+        "dirty_left": dirt_left,
+        "total_moves": sum(r.moves for r in model.roombas),
+        "avg_battery": sum(r.battery for r in model.roombas) / len(model.roombas) if model.roombas else 0,
+    }
+
+
+def _run_variant(args):
+    """
+    Trabajo de cada proceso: restaurar el checkpoint, aplicar la variante y correrla.
+    """
+    path, variant, steps = args
+    model = load_checkpoint(path)
+    variant = dict(variant)
+    seed = variant.pop("seed", None)
+    if seed is not None:  # Otra semilla hace que la variante diverja desde el checkpoint
+        model.random.seed(seed)
+        model.rng = np.random.default_rng(seed)
+    for name, value in variant.items():
+        setattr(model, name, value)
+
+    for _ in range(steps):
+        if not model.running:
+            break
+        model.step()
+    return summary(model)
+
+
+def fork_checkpoint(path, variants, steps, processes=None):
+    """
+    Corre varias variantes desde el mismo checkpoint en procesos separados.
+    Cada variante es un diccionario de atributos del modelo a cambiar (por ejemplo
+    {"max_steps": 8000} o {"seed": 7}). Regresa el resumen de cada variante en orden.
+    """
+    jobs = [(path, variant, steps) for variant in variants]
+    with Pool(processes) as pool:
+        return pool.map(_run_variant, jobs)
@@ -0,0 +1,169 @@
+from pathlib import Path
+
+import numpy as np
+
+# Recolector de métricas por columnas para corridas largas.
+# El DataCollector de Mesa agrega un valor de Python a una lista por cada reporter en cada paso,
+# así que la memoria crece sin límite. Aquí cada reporter es una columna de NumPy preasignada
+# por bloques de chunk_size muestras; se toma una muestra cada 'every' pasos (y siempre la del
+# último paso). Sin directorio, los bloques llenos se quedan en memoria; con directorio, cada
+# bloque lleno se escribe como un .npz (chunk_00000.npz, chunk_00001.npz, ...) y en memoria solo
+# queda la cola: el último bloque escrito y el que se está llenando, suficiente para las gráficas.
+# load_chunks vuelve a juntar los bloques escritos.
+#
+# Mantiene la interfaz que usa el resto del código: collect(model), model_vars (diccionario de
+# listas) y get_model_vars_dataframe() (para make_plot_component), indexado por paso.
+
+CHUNK_SIZE = 4096
+
+
+class ColumnarCollector:
+    """
+    Recolector de reporters del modelo en columnas de NumPy, con muestreo y escritura por bloques.
+    Args:
+        model_reporters: Diccionario nombre -> función que recibe el modelo
+        every: Pasos entre una muestra y la siguiente
+        chunk_size: Muestras por bloque
+        directory: Carpeta donde escribir los bloques llenos, None para dejarlos en memoria
+    """
+    def __init__(self, model_reporters, every=1, chunk_size=CHUNK_SIZE, directory=None):
+        self.reporters = dict(model_reporters)
+        self.every = every
+        self.chunk_size = chunk_size
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunks = [] # Bloques completos en memoria: (pasos, {nombre: columna})
+        self.flushed = 0 # Bloques escritos a disco
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self.steps = np.zeros(self.chunk_size, dtype=np.int64)
+        self.columns = {} # El dtype de cada columna se decide con su primer valor
+        self.fill = 0
+
+    def collect(self, model):
+        """
+        Toma una muestra de los reporters si al paso actual le toca (o si el modelo ya terminó).
+        """
+        step = model.current_step
+        if step % self.every and model.running:
+            return
+        i = self.fill
+        self.steps[i] = step
+        for name, reporter in self.reporters.items():
+            value = reporter(model)
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = np.zeros(self.chunk_size, dtype=np.asarray(value).dtype)
+            elif column.dtype.kind != "f" and isinstance(value, float):
+                column = self.columns[name] = column.astype(np.float64) # Un entero que se volvió flotante
+            column[i] = value
+        self.fill += 1
+        if self.fill == self.chunk_size:
+            self._close_chunk()
+
+    def _close_chunk(self):
+        """
+        Guarda el bloque que se estaba llenando (en disco o en memoria) y empieza uno nuevo.
+        """
+        steps = self.steps[:self.fill]
+        columns = {name: column[:self.fill] for name, column in self.columns.items()}
+        if self.directory is not None:
+            np.savez(self.directory / f"chunk_{self.flushed:05d}.npz", step=steps, **columns)
+            self.flushed += 1
+            self.chunks = [(steps, columns)] # La cola: solo el último bloque escrito
+        else:
+            self.chunks.append((steps, columns))
+        self._new_chunk()
+
+    def flush(self):
+        """
+        Escribe el bloque a medio llenar, por ejemplo al terminar la corrida. Sin carpeta no hace nada.
+        """
+        if self.directory is not None and self.fill:
+            self._close_chunk()
+
+    def _blocks(self):
+        blocks = list(self.chunks)
+        if self.fill:
+            blocks.append((self.steps[:self.fill], {n: c[:self.fill] for n, c in self.columns.items()}))
+        return blocks
+
+    def sampled_steps(self):
+        """
+        Pasos de las muestras que siguen en memoria.
+        """
+        blocks = self._blocks()
+        if not blocks:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([steps for steps, _ in blocks])
+
+    def column(self, name):
+        """
+        Valores del reporter name que siguen en memoria, como arreglo de NumPy.
+        """
+        blocks = self._blocks()
+        if not blocks:
+            return np.zeros(0)
+        return np.concatenate([columns[name] for _, columns in blocks])
+
+    @property
+    def model_vars(self):
+        """
+        Las muestras en memoria como el model_vars del DataCollector de Mesa: nombre -> lista.
+        """
+        return {name: self.column(name).tolist() for name in self.reporters}
+
+    def restore(self, model_vars, steps=None, flushed=0):
+        """
+        Carga muestras guardadas (por ejemplo de un checkpoint) como si se hubieran recolectado.
+        steps son sus pasos; si no se dan, se suponen una muestra cada 'every' pasos desde el primero.
+        """
+        n = len(next(iter(model_vars.values()), []))
+        if steps is None:
+            steps = [(i + 1) * self.every for i in range(n)]
+        self.chunks = []
+        self.flushed = flushed
+        self._new_chunk()
+        for start in range(0, n, self.chunk_size):
+            end = min(start + self.chunk_size, n)
+            self.steps[:end - start] = steps[start:end]
+            for name in self.reporters:
+                values = np.asarray(model_vars[name][start:end])
+                self.columns[name] = np.zeros(self.chunk_size, dtype=values.dtype)
+                self.columns[name][:end - start] = values
+            self.fill = end - start
+            if self.fill == self.chunk_size:
+                # Lo que ya se había escrito a disco no se vuelve a escribir
+                steps_block = self.steps[:self.fill]
+                columns = {name: column[:self.fill] for name, column in self.columns.items()}
+                self.chunks.append((steps_block, columns))
+                self._new_chunk()
+        if self.directory is not None:
+            self.chunks = self.chunks[-1:] # Con carpeta solo se conserva la cola
+
+    def get_model_vars_dataframe(self):
+        """
+        DataFrame de pandas con las muestras en memoria, indexado por paso.
+        """
+        import pandas as pd
+
+        frame = pd.DataFrame({name: self.column(name) for name in self.reporters})
+        frame.index = pd.Index(self.sampled_steps(), name="Step")
+        return frame
+
+
+def load_chunks(directory):
+    """
+    Junta los bloques .npz que escribió un ColumnarCollector en una sola tabla.
+    Regresa un diccionario nombre -> arreglo, con los pasos en "step".
+    """
+    paths = sorted(Path(directory).glob("chunk_*.npz"))
+    blocks = []
+    for path in paths:
+        with np.load(path) as data:
+            blocks.append({name: data[name] for name in data.files})
+    if not blocks:
+        return {}
+    return {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
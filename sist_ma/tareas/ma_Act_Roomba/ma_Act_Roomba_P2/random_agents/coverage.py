@@ -0,0 +1,159 @@
+import heapq
+from collections import deque
+
+# Exploración sistemática (boustrophedon) como alternativa al movimiento aleatorio.
+# Los Roombas no conocen el mapa al empezar, así que la cobertura se planea en línea: el grid se
+# parte en franjas verticales, una por Roomba, y cada franja se recorre en columnas de ida y
+# vuelta (como se ara un campo). Un Roomba ve sensor_radius columnas a cada lado, así que basta
+# una columna cada 2 * sensor_radius + 1 para ver toda la franja; las celdas sucias vecinas se
+# limpian al pasar (move las prioriza).
+#
+# El camino al siguiente extremo de columna se planea una vez con A* "optimista": las celdas
+# desconocidas se suponen libres y solo se evitan los obstáculos ya vistos. Solo se vuelve a
+# planear cuando la siguiente celda del camino resulta ser un obstáculo (o el Roomba se desvió a
+# limpiar); si el extremo de la columna es un obstáculo o no se puede alcanzar, se salta.
+
+# Las 8 direcciones de la vecindad de Moore
+DIRECCIONES = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def sweep_waypoints(x0, x1, y0, y1, start=None, radius=1):
+    """
+    Extremos de las columnas de un recorrido boustrophedon de la franja x0 <= x < x1,
+    y0 <= y < y1, para un sensor que ve radius columnas a cada lado.
+    Empieza por la orilla y el extremo más cercanos a start (x, y).
+    """
+    lanes = list(range(min(x0 + radius, x1 - 1), x1, 2 * radius + 1))
+    if lanes[-1] + radius < x1 - 1: # La última columna no alcanza a ver la orilla de la franja
+        lanes.append(x1 - 1)
+    top, bottom = y0, y1 - 1
+    if start is not None:
+        if abs(start[0] - lanes[-1]) < abs(start[0] - lanes[0]):
+            lanes.reverse()
+        if abs(start[1] - bottom) < abs(start[1] - top):
+            top, bottom = bottom, top
+
+    waypoints = []
+    for i, x in enumerate(lanes):
+        ends = [(x, top), (x, bottom)]
+        if i % 2:
+            ends.reverse()
+        waypoints.extend(ends)
+    return waypoints
+
+
+def optimistic_path(knowledge, start, goal):
+    """
+    Camino más corto de start a goal suponiendo libres las celdas que no se sabe que son obstáculo.
+    Regresa la lista de coordenadas sin start, o None si los obstáculos conocidos lo impiden.
+    """
+    width, height = knowledge.width, knowledge.height
+    blocked = knowledge.blocked
+    buffers = knowledge.buffers
+    search = buffers.new_search()
+    dist, prev, stamp = buffers.dist, buffers.prev, buffers.stamp
+    gx, gy = goal
+    s = knowledge.node(start)
+    g = knowledge.node(goal)
+    dist[s] = 0
+    prev[s] = -1
+    stamp[s] = search
+    # Con costo 1 en diagonal muchísimos nodos empatan en f; se desempata por el más avanzado
+    heap = [(max(abs(start[0] - gx), abs(start[1] - gy)), 0, s)]
+
+    while heap:
+        _, neg_cost, u = heapq.heappop(heap)
+        cost = -neg_cost
+        if cost > dist[u]:
+            continue
+        if u == g:
+            path = []
+            while u != s:
+                path.append(knowledge.coord(u))
+                u = prev[u]
+            path.reverse()
+            return path
+
+        x, y = u % width, u // width
+        alt = cost + 1
+        for dx, dy in DIRECCIONES:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            v = ny * width + nx
+            if blocked[v]:
+                continue
+            if stamp[v] != search or alt < dist[v]:
+                stamp[v] = search
+                dist[v] = alt
+                prev[v] = u
+                heapq.heappush(heap, (alt + max(abs(nx - gx), abs(ny - gy)), -alt, v))
+    return None
+
+
+class CoveragePlan:
+    """
+    Recorrido boustrophedon de una franja para un Roomba.
+    Args:
+        waypoints: Extremos de columnas en orden (ver sweep_waypoints)
+    """
+    def __init__(self, waypoints):
+        self.waypoints = deque(waypoints)
+        self.path = [] # Celdas que faltan para llegar al siguiente extremo
+        self.replans = 0 # Para estadísticas
+
+    @property
+    def finished(self):
+        return not self.waypoints
+
+    def next_step(self, knowledge, position):
+        """
+        Siguiente celda a la que moverse desde position, o None si la franja ya se recorrió.
+        """
+        while self.waypoints:
+            goal = self.waypoints[0]
+            if position == goal or knowledge.is_blocked(goal):
+                self.waypoints.popleft()
+                self.path = []
+                continue
+
+            # Seguir el camino planeado mientras la siguiente celda sea vecina y no sea obstáculo
+            if self.path:
+                nx, ny = self.path[0]
+                if max(abs(nx - position[0]), abs(ny - position[1])) == 1 and not knowledge.is_blocked((nx, ny)):
+                    return self.path.pop(0)
+
+            self.path = optimistic_path(knowledge, position, goal) or []
+            self.replans += 1
+            if not self.path: # Encerrado por obstáculos conocidos, saltar este extremo
+                self.waypoints.popleft()
+                continue
+            return self.path.pop(0)
+        return None
+
+
+def assign_regions(model, homes=None):
+    """
+    Parte el interior del grid en una franja vertical por Roomba (de izquierda a derecha, en el
+    orden de sus estaciones) y le da a cada uno su CoveragePlan.
+    homes son las estaciones de toda la flota cuando el modelo solo tiene a una parte de los
+    Roombas (un dominio de domains.py); por omisión, las de model.roombas.
+    """
+    if homes is None:
+        homes = [robot.homepos for robot in model.roombas]
+    homes = sorted(homes, key=lambda home: home[0])
+    x0, x1 = 1, model.width - 1 # Sin el borde, que siempre es obstáculo
+    y0, y1 = 1, model.height - 1
+    if not homes or x1 <= x0 or y1 <= y0:
+        return
+    bands = len(homes)
+    for robot in model.roombas:
+        i = homes.index(robot.homepos)
+        bx0 = x0 + (x1 - x0) * i // bands
+        bx1 = x0 + (x1 - x0) * (i + 1) // bands
+        if bx1 <= bx0: # Más Roombas que columnas
+            robot.coverage = CoveragePlan([])
+            continue
+        robot.coverage = CoveragePlan(
+            sweep_waypoints(bx0, bx1, y0, y1, start=robot.homepos, radius=robot.sensor_radius)
+        )
@@ -0,0 +1,574 @@
+import random
+from bisect import bisect_right
+from array import array
+from multiprocessing import Pipe, Process
+from types import SimpleNamespace
+
+import numpy as np
+
+from .agent import ChargingStation, RoombaRobot
+from .checkpoint import ESTADOS
+from .coverage import CoveragePlan, assign_regions
+from .knowledge_map import DistanceField, KnowledgeMap
+from .model import RandomModel
+
+# Descomposición espacial del mundo de los Roombas en varios procesos, para pisos muy grandes.
+# El grid se parte en columns x rows rectángulos (dominios). Cada proceso es dueño de las celdas
+# de su dominio y de los Roombas que están en ellas. Alrededor de su dominio guarda un halo de
+# sensor_radius + 1 celdas: lo que un Roomba puede ver desde su dominio o desde la celda de al
+# lado, a la que acaba de salir antes de migrar.
+#
+# Ningún proceso genera el mundo completo. Los obstáculos y la suciedad salen por bloques de
+# TILE x TILE celdas, cada uno de un generador con semilla (seed, bloque), así que cada proceso
+# genera solo los bloques de su dominio y su halo y todos coinciden en las celdas que comparten.
+# Las estaciones (una por Roomba, pocas) se sortean con otro generador con la misma semilla y
+# todos los procesos las crean; cada uno crea solo a sus Roombas. Los obstáculos y la suciedad
+# viven solo en las capas del grid (use_property_layers=True), sin un agente por celda. El grid
+# de Mesa y las capas sí tienen el tamaño del piso completo (así las coordenadas son las mismas
+# en todos los procesos), pero fuera del dominio y su halo están vacíos.
+#
+# En cada paso cada proceso recibe los mensajes de sus vecinos del paso anterior, avanza a sus
+# Roombas con RandomModel.advance y manda solo:
+# - la suciedad de sus celdas que caen en el halo de cada vecino
+# - los Roombas que salieron de su dominio (migrantes), con su batería, estado y mapa interno
+# - las posiciones de sus Roombas junto al borde, para detectar encuentros entre dominios
+# - el mapa de sus Roombas que se encontraron con uno del otro lado (el intercambio de
+#   conocimiento de RandomModel.share_knowledge, pero por mensajes y un paso después)
+# El proceso principal solo enruta los mensajes y suma las estadísticas para decidir cuándo
+# termina la simulación.
+#
+# Las reservaciones de celdas y las filas de las estaciones son de cada dominio: un Roomba que
+# migra suelta las suyas (y su celda sucia asignada) y vuelve a planear del otro lado. Por eso,
+# porque cada dominio tiene su propio generador aleatorio y porque el mundo se genera por
+# bloques, la corrida no es idéntica a la de un solo RandomModel con la misma semilla, aunque
+# sigue las mismas reglas.
+
+TILE = 64 # Lado de los bloques en que se genera el mundo
+
+
+def _cuts(size, parts):
+    return [size * i // parts for i in range(parts + 1)]
+
+
+class DomainLayout:
+    """
+    Partición del grid de width x height en columns x rows dominios rectangulares.
+    El dominio d está en la columna d % columns y la fila d // columns.
+    """
+    def __init__(self, width, height, columns, rows):
+        if not (1 <= columns <= width and 1 <= rows <= height):
+            raise ValueError(f"No se puede partir un grid de {width}x{height} en {columns}x{rows} dominios")
+        self.columns = columns
+        self.rows = rows
+        self.xs = _cuts(width, columns)
+        self.ys = _cuts(height, rows)
+
+    def __len__(self):
+        return self.columns * self.rows
+
+    def bounds(self, domain):
+        """
+        (x0, y0, x1, y1) del dominio, con x1 y y1 exclusivos.
+        """
+        cx, cy = domain % self.columns, domain // self.columns
+        return self.xs[cx], self.ys[cy], self.xs[cx + 1], self.ys[cy + 1]
+
+    def owner(self, coord):
+        """
+        Dominio dueño de la celda coord.
+        """
+        cx = bisect_right(self.xs, coord[0]) - 1
+        cy = bisect_right(self.ys, coord[1]) - 1
+        return cy * self.columns + cx
+
+    def neighbors(self, domain):
+        """
+        Dominios que tocan al dominio (incluyendo diagonales).
+        """
+        cx, cy = domain % self.columns, domain // self.columns
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                nx, ny = cx + dx, cy + dy
+                if (dx or dy) and 0 <= nx < self.columns and 0 <= ny < self.rows:
+                    yield ny * self.columns + nx
+
+
+def _pack_robot(robot, gid):
+    """
+    Lo necesario para que otro proceso reconstruya al Roomba que migra.
+    """
+    return {
+        "gid": gid,
+        "pos": robot.cell.coordinate,
+        "home": robot.homepos,
+        "battery": robot.battery,
+        "threshold": robot.low_battery_threshold,
+        "sensor": robot.sensor_radius,
+        "moves": robot.moves,
+        "state": ESTADOS.index(robot.state),
+        "map": _pack_map(robot.map, visited=True),
+        "coverage": None if robot.coverage is None else (
+            list(robot.coverage.waypoints), robot.coverage.path, robot.coverage.replans
+        ),
+    }
+
+
+def _pack_map(knowledge, visited=False):
+    packed = {"known": bytes(knowledge.known), "edges": bytes(knowledge.edges), "blocked": bytes(knowledge.blocked)}
+    if visited:
+        packed["visited"] = bytes(knowledge.visited)
+        # El campo de distancias viaja con el mapa para no reconstruirlo del otro lado
+        field = knowledge.field
+        if field is not None:
+            packed["field"] = (field.dist.tobytes(), list(field.sources), list(field.heap))
+    return packed
+
+
+def _unpack_map(packed, width, height, buffers):
+    knowledge = KnowledgeMap(width, height, buffers)
+    for name in ("known", "visited", "edges", "blocked"):
+        if name in packed:
+            getattr(knowledge, name)[:] = packed[name]
+    if "field" in packed:
+        dist, sources, heap = packed["field"]
+        field = knowledge.field = DistanceField(knowledge)
+        field.dist = array("i", dist)
+        field.sources = set(sources)
+        field.heap = heap
+    return knowledge
+
+
+class WorldTiles:
+    """
+    Obstáculos, suciedad y estaciones de un mundo generado por bloques de TILE x TILE celdas.
+    Cualquier proceso obtiene lo mismo para cualquier celda sin generar el resto del grid.
+    Args:
+        seed: Semilla entera de la simulación
+        width, height, percent_obstacles, percent_dirty: Como en RandomModel
+    """
+    def __init__(self, seed, width, height, percent_obstacles, percent_dirty):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.percent_obstacles = percent_obstacles
+        self.percent_dirty = percent_dirty
+        self.tiles = {} # (tx, ty) -> (obstáculos, suciedad), indexados [x, y]
+
+    def tile(self, tx, ty):
+        """
+        Obstáculos y suciedad del bloque (tx, ty); el borde del grid siempre es obstáculo.
+        """
+        tile = self.tiles.get((tx, ty))
+        if tile is None:
+            x0, y0 = tx * TILE, ty * TILE
+            w, h = min(TILE, self.width - x0), min(TILE, self.height - y0)
+            # Siempre se sortea el bloque completo, para que no dependa del tamaño del grid
+            draws = np.random.default_rng([self.seed, tx, ty]).random((2, TILE, TILE))[:, :w, :h]
+            xs = np.arange(x0, x0 + w)[:, None]
+            ys = np.arange(y0, y0 + h)[None, :]
+            obstacle = (draws[0] < self.percent_obstacles) | (xs == 0) | (xs == self.width - 1) \
+                | (ys == 0) | (ys == self.height - 1)
+            dirty = ~obstacle & (draws[1] < self.percent_dirty)
+            tile = self.tiles[(tx, ty)] = (obstacle, dirty)
+        return tile
+
+    def region(self, x0, y0, x1, y1):
+        """
+        Obstáculos y suciedad de las celdas x0 <= x < x1, y0 <= y < y1, como arreglos [x, y].
+        """
+        obstacle = np.zeros((x1 - x0, y1 - y0), dtype=bool)
+        dirty = np.zeros((x1 - x0, y1 - y0), dtype=bool)
+        for tx in range(x0 // TILE, (x1 - 1) // TILE + 1):
+            for ty in range(y0 // TILE, (y1 - 1) // TILE + 1):
+                tile_obstacle, tile_dirty = self.tile(tx, ty)
+                # Parte del bloque dentro de la región, en coordenadas del bloque y de la región
+                ax0, ay0 = max(x0, tx * TILE), max(y0, ty * TILE)
+                ax1, ay1 = min(x1, tx * TILE + TILE), min(y1, ty * TILE + TILE)
+                source = (slice(ax0 - tx * TILE, ax1 - tx * TILE), slice(ay0 - ty * TILE, ay1 - ty * TILE))
+                target = (slice(ax0 - x0, ax1 - x0), slice(ay0 - y0, ay1 - y0))
+                obstacle[target] = tile_obstacle[source]
+                dirty[target] = tile_dirty[source]
+        return obstacle, dirty
+
+    def is_free(self, coord):
+        """
+        True si la celda no es obstáculo ni está sucia.
+        """
+        x, y = coord
+        obstacle, dirty = self.tile(x // TILE, y // TILE)
+        return not (obstacle[x % TILE, y % TILE] or dirty[x % TILE, y % TILE])
+
+    def stations(self, count):
+        """
+        Coordenadas de count estaciones en celdas libres distintas, sorteadas con la semilla.
+        """
+        rng = random.Random(f"{self.seed}:estaciones")
+        stations = []
+        for _ in range(1000 * count):
+            if len(stations) == count:
+                break
+            coord = (rng.randrange(self.width), rng.randrange(self.height))
+            if coord not in stations and self.is_free(coord):
+                stations.append(coord)
+        if len(stations) < count:
+            raise ValueError(f"No se encontraron celdas libres para {count} estaciones")
+        return stations
+
+
+class DomainModel(RandomModel):
+    """
+    RandomModel de un solo dominio: genera solo su dominio y su halo y crea solo sus Roombas.
+    Args:
+        layout: DomainLayout de toda la simulación
+        domain: Índice de este dominio en layout
+        params: Parámetros de RandomModel (los mismos en todos los dominios)
+    """
+    def __init__(self, layout, domain, **params):
+        # build_world y place_roombas los usan durante RandomModel.__init__
+        self.layout = layout
+        self.domain = domain
+        self.x0, self.y0, self.x1, self.y1 = layout.bounds(domain)
+        self.halo = params.get("sensor_radius", 1) + 1
+        self.tiles = WorldTiles(
+            params["seed"], params["width"], params["height"],
+            params["percent_obstacles"], params["percent_dirty"],
+        )
+        # gid: índice del Roomba (y de su estación) en la simulación completa, no cambia al migrar
+        self.gids = {}
+        super().__init__(**dict(params, use_property_layers=True))
+        self.discard_foreign_dirt()
+
+        # Cada dominio con su propio generador para que no repitan las mismas decisiones
+        self.random.seed(f"{self.seed}:{domain}")
+        self.encounters = [] # (gid propio, dominio vecino, gid ajeno) detectados al recibir mensajes
+
+    def build_world(self):
+        """
+        Obstáculos y suciedad solo del dominio y su halo (ver WorldTiles).
+        """
+        x0, y0 = max(0, self.x0 - self.halo), max(0, self.y0 - self.halo)
+        x1, y1 = min(self.width, self.x1 + self.halo), min(self.height, self.y1 + self.halo)
+        obstacle, dirty = self.tiles.region(x0, y0, x1, y1)
+        self.grid.obstacle.data[x0:x1, y0:y1] = obstacle
+        self.grid.dirty.data[x0:x1, y0:y1] = dirty
+        self.initial_dirty_cells = int(dirty[self.x0 - x0:self.x1 - x0, self.y0 - y0:self.y1 - y0].sum())
+
+    def place_roombas(self):
+        """
+        Crea todas las estaciones y solo a los Roombas cuya estación está en el dominio.
+        """
+        homes = self.tiles.stations(self.num_agents)
+        for gid, home in enumerate(homes):
+            cell = self.grid[home]
+            ChargingStation(self, cell=cell)
+            if self.owns(home):
+                roomba = RoombaRobot(
+                    model=self,
+                    cell=cell,
+                    battery=100,
+                    low_battery_threshold=20,
+                    sensor_radius=self.sensor_radius,
+                )
+                self.roombas.append(roomba)
+                self.gids[roomba] = gid
+        # Las franjas se reparten entre toda la flota, no solo entre los Roombas del dominio
+        if self.exploration == "coverage":
+            assign_regions(self, homes)
+
+    def owns(self, coord):
+        return self.x0 <= coord[0] < self.x1 and self.y0 <= coord[1] < self.y1
+
+    def dirt_left(self):
+        """
+        Celdas sucias del dominio (el resto del grid es de otros procesos).
+        """
+        return int(self.grid.dirty.data[self.x0:self.x1, self.y0:self.y1].sum())
+
+    def discard_foreign_dirt(self):
+        """
+        La subasta solo reparte la suciedad del dominio; la del halo la reparte su dueño.
+        """
+        if self.coordinator is not None:
+            for coord in [c for c in self.coordinator.dirt if not self.owns(c)]:
+                self.coordinator.dirt.discard(coord)
+
+    def step(self):
+        self.current_step += 1
+        self.advance()
+        self.discard_foreign_dirt()
+
+    # Mensajes entre dominios
+
+    def receive(self, messages):
+        """
+        Aplica los mensajes de los vecinos: migrantes, suciedad del halo, Roombas junto al borde
+        (para detectar encuentros) y mapas de los Roombas ajenos que se encontraron con los propios.
+        """
+        by_gid = {gid: robot for robot, gid in self.gids.items()}
+        for sender, message in messages:
+            for packed in message["migrants"]:
+                robot = self.adopt(packed)
+                by_gid[packed["gid"]] = robot
+
+            x0, y0, dirty = message["halo"]
+            self.grid.dirty.data[x0:x0 + dirty.shape[0], y0:y0 + dirty.shape[1]] = dirty
+
+            for gid, coord in message["border"]:
+                for robot in self.robot_index.robots_near(coord):
+                    if robot.state != "DEAD":
+                        self.encounters.append((self.gids[robot], sender, gid))
+
+            for gid, packed in message["gossip"]:
+                robot = by_gid.get(gid)
+                if robot is not None and robot.state != "DEAD":
+                    # merge solo lee known, edges y blocked, no hace falta armar un KnowledgeMap
+                    robot.map.merge(SimpleNamespace(**packed))
+
+    def adopt(self, packed):
+        """
+        Reconstruye un Roomba que migró desde otro dominio.
+        """
+        robot = RoombaRobot(
+            model=self,
+            cell=self.grid[packed["pos"]],
+            battery=packed["battery"],
+            low_battery_threshold=packed["threshold"],
+            sensor_radius=packed["sensor"],
+        )
+        robot.homepos = packed["home"]
+        robot.home_cell = self.grid[robot.homepos]
+        robot.moves = packed["moves"]
+        robot.state = ESTADOS[packed["state"]]
+        robot.map = _unpack_map(packed["map"], self.width, self.height, self.search_buffers)
+        if packed["coverage"] is not None:
+            waypoints, path, replans = packed["coverage"]
+            robot.coverage = CoveragePlan(waypoints)
+            robot.coverage.path = list(path)
+            robot.coverage.replans = replans
+        self.gids[robot] = packed["gid"]
+        self.roombas.append(robot)
+        return robot
+
+    def outbox(self):
+        """
+        Mensajes para cada dominio vecino después de avanzar el paso.
+        """
+        messages = {}
+        for other in self.layout.neighbors(self.domain):
+            ox0, oy0, ox1, oy1 = self.layout.bounds(other)
+            # Celdas propias dentro del halo del vecino
+            hx0, hx1 = max(self.x0, ox0 - self.halo), min(self.x1, ox1 + self.halo)
+            hy0, hy1 = max(self.y0, oy0 - self.halo), min(self.y1, oy1 + self.halo)
+            messages[other] = {
+                "halo": (hx0, hy0, self.grid.dirty.data[hx0:hx1, hy0:hy1].copy()),
+                "migrants": [],
+                "border": [],
+                "gossip": [],
+            }
+
+        # Los Roombas que salieron del dominio se van con su nuevo dueño
+        for robot in [r for r in self.roombas if not self.owns(r.cell.coordinate)]:
+            gid = self.gids.pop(robot)
+            robot.leave_reservations()
+            robot.drop_target()
+            messages[self.layout.owner(robot.cell.coordinate)]["migrants"].append(_pack_robot(robot, gid))
+            self.roombas.remove(robot)
+            robot.remove()
+
+        # Roombas vivos a una celda o menos de cada vecino, para los encuentros del siguiente paso
+        for robot in self.roombas:
+            if robot.state == "DEAD":
+                continue
+            x, y = robot.cell.coordinate
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    coord = (x + dx, y + dy)
+                    if not self.owns(coord) and 0 <= coord[0] < self.width and 0 <= coord[1] < self.height:
+                        other = self.layout.owner(coord)
+                        entry = (self.gids[robot], robot.cell.coordinate)
+                        if entry not in messages[other]["border"]:
+                            messages[other]["border"].append(entry)
+
+        # Mapas para los Roombas ajenos con los que se encontraron los propios
+        by_gid = {gid: robot for robot, gid in self.gids.items()}
+        for own, other, foreign in self.encounters:
+            robot = by_gid.get(own)
+            if robot is not None:
+                messages[other]["gossip"].append((foreign, _pack_map(robot.map)))
+        self.encounters = []
+        return messages
+
+
+class DomainWorker:
+    """
+    Un dominio con la interfaz que usa DecomposedModel; corre en su propio proceso o en el mismo.
+    """
+    def __init__(self, layout, domain, params):
+        self.model = DomainModel(layout, domain, **params)
+
+    def step(self, messages):
+        """
+        Recibe los mensajes del paso anterior, avanza un paso y regresa (mensajes, estadísticas).
+        """
+        model = self.model
+        model.receive(messages)
+        model.step()
+        outbox = model.outbox()
+        stats = {
+            "dirt_left": model.dirt_left(),
+            "robots": len(model.roombas) + sum(len(m["migrants"]) for m in outbox.values()),
+            "dead": sum(r.state == "DEAD" for r in model.roombas),
+            "moves": sum(r.moves for r in model.roombas) + sum(p["moves"] for m in outbox.values() for p in m["migrants"]),
+            "battery": sum(r.battery for r in model.roombas) + sum(p["battery"] for m in outbox.values() for p in m["migrants"]),
+        }
+        return outbox, stats
+
+    def info(self):
+        return {"initial_dirty_cells": self.model.initial_dirty_cells, "robots": len(self.model.roombas)}
+
+    def snapshot(self):
+        """
+        Celdas del dominio como raster y sus Roombas, para armar el snapshot completo.
+        """
+        model = self.model
+        raster = model.grid_raster()[model.x0:model.x1, model.y0:model.y1]
+        robots = [(model.gids[r], r.cell.coordinate[0], r.cell.coordinate[1], r.state) for r in model.roombas]
+        return (model.x0, model.y0, raster), robots
+
+
+def _serve(conn, layout, domain, params):
+    """
+    Ciclo de un proceso de dominio: recibe (método, argumentos) y responde con el resultado.
+    """
+    worker = DomainWorker(layout, domain, params)
+    while True:
+        name, args = conn.recv()
+        if name == "close":
+            conn.close()
+            return
+        conn.send(getattr(worker, name)(*args))
+
+
+class DecomposedModel:
+    """
+    Simulación de RandomModel repartida en dominios, cada uno en su propio proceso.
+    Args:
+        num_agents, width, height, percent_dirty, percent_obstacles, max_steps: Como en RandomModel
+        seed: Semilla entera, la misma para todos los dominios (None sortea una)
+        domains: (columnas, filas) de dominios
+        processes: Si es False los dominios corren en este proceso, uno tras otro (para depurar)
+        options: Otros parámetros de RandomModel (sensor_radius, exploration, allocation, ...)
+    """
+    def __init__(self, num_agents, width=8, height=8, percent_dirty=0.3, percent_obstacles=0.05,
+                 max_steps=3000, seed=42, domains=(2, 2), processes=True, **options):
+        self.width = width
+        self.height = height
+        self.max_steps = max_steps
+        self.layout = DomainLayout(width, height, *domains)
+        halo = options.get("sensor_radius", 1) + 1
+        if min(b - a for a, b in zip(self.layout.xs, self.layout.xs[1:])) < halo or \
+                min(b - a for a, b in zip(self.layout.ys, self.layout.ys[1:])) < halo:
+            raise ValueError(f"Cada dominio debe medir al menos sensor_radius + 1 = {halo} celdas por lado")
+        if seed is None:
+            seed = random.randrange(2 ** 32) # Todos los dominios deben generar el mismo mundo
+        params = dict(
+            num_agents=num_agents, width=width, height=height, percent_dirty=percent_dirty,
+            percent_obstacles=percent_obstacles, max_steps=max_steps, seed=seed, **options,
+        )
+
+        self.processes = []
+        self.connections = []
+        self.workers = []
+        if processes:
+            for domain in range(len(self.layout)):
+                parent, child = Pipe()
+                process = Process(target=_serve, args=(child, self.layout, domain, params), daemon=True)
+                process.start()
+                self.processes.append(process)
+                self.connections.append(parent)
+        else:
+            self.workers = [DomainWorker(self.layout, d, params) for d in range(len(self.layout))]
+
+        info = self._call_all("info")
+        self.num_agents = sum(i["robots"] for i in info)
+        self.initial_dirty_cells = sum(i["initial_dirty_cells"] for i in info)
+        self.inboxes = [[] for _ in range(len(self.layout))]
+        self.stats = None
+        self.current_step = 0
+        self.running = True
+
+    def _call_all(self, name, args_list=None):
+        """
+        Llama al método en todos los dominios; con procesos, todos trabajan a la vez.
+        """
+        args_list = args_list or [()] * len(self.layout)
+        if self.workers:
+            return [getattr(worker, name)(*args) for worker, args in zip(self.workers, args_list)]
+        for conn, args in zip(self.connections, args_list):
+            conn.send((name, args))
+        return [conn.recv() for conn in self.connections]
+
+    def step(self):
+        self.current_step += 1
+        results = self._call_all("step", [(inbox,) for inbox in self.inboxes])
+        self.inboxes = [[] for _ in range(len(self.layout))]
+        for sender, (outbox, _) in enumerate(results):
+            for receiver, message in outbox.items():
+                self.inboxes[receiver].append((sender, message))
+
+        stats = [s for _, s in results]
+        self.stats = {name: sum(s[name] for s in stats) for name in stats[0]}
+        if (
+            self.current_step >= self.max_steps
+            or self.stats["dirt_left"] <= 0
+            or self.stats["dead"] == self.stats["robots"]
+        ):
+            self.running = False
+
+    def dirt_left(self):
+        return self.initial_dirty_cells if self.stats is None else self.stats["dirt_left"]
+
+    def summary(self):
+        """
+        Resumen de la corrida con las mismas llaves que checkpoint.summary.
+        """
+        stats = self.stats or {"dirt_left": self.initial_dirty_cells, "moves": 0, "battery": 0, "robots": 0}
+        return {
+            "steps": self.current_step,
+            "cleaned": self.initial_dirty_cells - stats["dirt_left"],
+            "dirty_left": stats["dirt_left"],
+            "total_moves": stats["moves"],
+            "avg_battery": stats["battery"] / stats["robots"] if stats["robots"] else 0,
+        }
+
+    def snapshot(self):
+        """
+        Snapshot con el mismo formato que RandomModel.snapshot(), armado con los de cada dominio.
+        """
+        raster = np.zeros((self.width, self.height), dtype=np.int8)
+        robots = []
+        for (x0, y0, block), domain_robots in self._call_all("snapshot"):
+            raster[x0:x0 + block.shape[0], y0:y0 + block.shape[1]] = block
+            robots.extend(domain_robots)
+        # Los que cruzaron un borde en el último paso todavía van en los mensajes
+        for inbox in self.inboxes:
+            for _, message in inbox:
+                for packed in message["migrants"]:
+                    robots.append((packed["gid"], *packed["pos"], ESTADOS[packed["state"]]))
+        robots.sort()
+        return {
+            "step": self.current_step,
+            "raster": raster,
+            "robots": [(x, y, state) for _, x, y, state in robots],
+        }
+
+    def close(self):
+        """
+        Termina los procesos de los dominios.
+        """
+        for conn in self.connections:
+            conn.send(("close", ()))
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
@@ -0,0 +1,348 @@
+import heapq
+from array import array
+
+import numpy as np
+
+# Mapa interno de un Roomba con nodos enteros y adyacencia en arreglos.
+# Cada celda del grid es el nodo y * width + x. En lugar de un diccionario de coordenadas a
+# conjuntos de coordenadas, el mapa guarda un byte por celda:
+# - known: 1 si el Roomba conoce la celda (es transitable, las celdas con obstáculo nunca se agregan)
+# - visited: 1 si ya pasó por ella
+# - edges: máscara de 8 bits, el bit i indica una arista hacia la vecina en DIRECCIONES[i]
+# - blocked: 1 si el Roomba vio que la celda es obstáculo (lo usa la cobertura sistemática)
+# Todos son bytearray: indexarlos desde Python es tan rápido como una lista y NumPy los puede
+# ver sin copiar (np.frombuffer) para las operaciones de todo el mapa, como fusionar dos mapas.
+# Las búsquedas reutilizan los mismos buffers de distancias y previos en cada llamada; una marca
+# por búsqueda indica qué entradas son válidas, así no hay que limpiarlos. Los Roombas de un
+# modelo buscan uno a la vez, así que todos sus mapas comparten los buffers del modelo; cada
+# modelo tiene los suyos porque los dashboards corren varios modelos en hilos del mismo proceso.
+# Las tablas de desplazamientos solo se leen y sí se comparten entre todos los mapas.
+#
+# DistanceField guarda la distancia de cada nodo a la estación conocida más cercana y se repara
+# de forma incremental (como LPA* / D* Lite). La búsqueda va hacia atrás, desde las estaciones,
+# así que moverse no invalida nada; y como el mapa solo crece (nunca se quitan aristas), las
+# distancias solo pueden bajar: cada arista o estación nueva se propaga desde sus extremos y solo
+# se tocan los nodos cuya distancia mejora, en lugar de repetir la búsqueda completa cada paso.
+
+# Las 8 direcciones de la vecindad de Moore, el bit i de edges indica una arista en DIRECCIONES[i]
+DIRECCIONES = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+BIT_DIRECCION = {d: i for i, d in enumerate(DIRECCIONES)}
+OPUESTA = [BIT_DIRECCION[(-dx, -dy)] for dx, dy in DIRECCIONES]
+
+
+class SearchBuffers:
+    """
+    Distancias, previos y marcas de búsqueda para un grafo de size nodos.
+    """
+    def __init__(self, size):
+        self.dist = [0] * size
+        self.prev = [0] * size
+        self.stamp = [0] * size
+        self.search = 0
+
+    def new_search(self):
+        self.search += 1
+        return self.search
+
+
+_offsets = {} # width -> (desplazamientos, desplazamientos por máscara), solo se leen
+
+
+def neighbor_tables(width):
+    """
+    Desplazamiento en ids de cada dirección y, para cada máscara posible, sus desplazamientos.
+    """
+    tables = _offsets.get(width)
+    if tables is None:
+        offsets = [dy * width + dx for dx, dy in DIRECCIONES]
+        masks = [tuple(offsets[b] for b in range(8) if mask & (1 << b)) for mask in range(256)]
+        tables = _offsets[width] = (offsets, masks)
+    return tables
+
+
+class KnowledgeMap:
+    """
+    Grafo conocido por un Roomba sobre un grid de width x height.
+    Args:
+        buffers: SearchBuffers para las búsquedas, los del modelo; sin ellos el mapa crea los suyos
+    """
+    def __init__(self, width, height, buffers=None):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.known = bytearray(self.size)
+        self.visited = bytearray(self.size)
+        self.edges = bytearray(self.size)
+        self.blocked = bytearray(self.size)
+
+        # Desplazamiento en ids de cada dirección y, para cada máscara posible, sus desplazamientos
+        self.offsets, self.neighbor_offsets = neighbor_tables(width)
+
+        self.buffers = buffers if buffers is not None else SearchBuffers(self.size)
+        self.field = None # DistanceField a las estaciones, se crea la primera vez que se usa
+
+    # Conversión entre coordenadas (x, y) y nodos
+
+    def node(self, coord):
+        return coord[1] * self.width + coord[0]
+
+    def coord(self, node):
+        return (node % self.width, node // self.width)
+
+    def __contains__(self, coord):
+        return bool(self.known[coord[1] * self.width + coord[0]])
+
+    def visit(self, coord):
+        self.visited[coord[1] * self.width + coord[0]] = 1
+
+    def is_visited(self, coord):
+        return bool(self.visited[coord[1] * self.width + coord[0]])
+
+    def block(self, coord):
+        self.blocked[coord[1] * self.width + coord[0]] = 1
+
+    def is_blocked(self, coord):
+        return bool(self.blocked[coord[1] * self.width + coord[0]])
+
+    # Vistas de NumPy sin copia, indexadas [y, x]
+
+    def as_array(self, buffer):
+        return np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width)
+
+    def known_nodes(self):
+        return np.flatnonzero(np.frombuffer(self.known, dtype=np.uint8)).tolist()
+
+    def pending_nodes(self):
+        """
+        Nodos conocidos que aún no se han visitado.
+        """
+        known = np.frombuffer(self.known, dtype=np.uint8)
+        visited = np.frombuffer(self.visited, dtype=np.uint8)
+        return np.flatnonzero(known > visited).tolist()
+
+    # Construcción del grafo
+
+    def add_node(self, node):
+        self.known[node] = 1
+
+    def add_edge(self, u, v, direction):
+        """
+        Agrega la arista u -> v (v está en DIRECCIONES[direction] de u) en ambos sentidos.
+        """
+        self.known[u] = 1
+        self.known[v] = 1
+        self.edges[u] |= 1 << direction
+        self.edges[v] |= 1 << OPUESTA[direction]
+        if self.field is not None:
+            self.field.edge_added(u, v)
+
+    def neighbors(self, node):
+        return [node + off for off in self.neighbor_offsets[self.edges[node]]]
+
+    def merge(self, other):
+        """
+        Une el grafo de other dentro de este (celdas conocidas, aristas y obstáculos; no las visitadas).
+        """
+        if self.field is not None:
+            # Nodos que ganan aristas, ambos extremos de cada arista nueva están aquí
+            own = np.frombuffer(self.edges, dtype=np.uint8)
+            gained = np.flatnonzero(np.frombuffer(other.edges, dtype=np.uint8) & ~own).tolist()
+        np.bitwise_or(
+            np.frombuffer(self.known, dtype=np.uint8),
+            np.frombuffer(other.known, dtype=np.uint8),
+            out=np.frombuffer(self.known, dtype=np.uint8),
+        )
+        np.bitwise_or(
+            np.frombuffer(self.edges, dtype=np.uint8),
+            np.frombuffer(other.edges, dtype=np.uint8),
+            out=np.frombuffer(self.edges, dtype=np.uint8),
+        )
+        np.bitwise_or(
+            np.frombuffer(self.blocked, dtype=np.uint8),
+            np.frombuffer(other.blocked, dtype=np.uint8),
+            out=np.frombuffer(self.blocked, dtype=np.uint8),
+        )
+        if self.field is not None:
+            self._edges_gained(gained)
+
+    def reveal(self, x0, y0, free):
+        """
+        Agrega de golpe una ventana del grid vista por el sensor: free es un arreglo booleano
+        (alto, ancho) indexado [y, x] cuya esquina es (x0, y0). Las celdas libres quedan
+        conocidas, las demás como obstáculos, y se agregan las aristas entre celdas libres
+        vecinas de la ventana.
+        """
+        h, w = free.shape
+        window = np.zeros((h, w), dtype=np.uint8)
+        for bit, (dx, dy) in enumerate(DIRECCIONES):
+            # Celdas con la vecina (x + dx, y + dy) también dentro de la ventana
+            src = free[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)]
+            dst = free[max(0, dy):h - max(0, -dy), max(0, dx):w - max(0, -dx)]
+            window[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)] |= (src & dst).astype(np.uint8) << bit
+
+        rows, cols = slice(y0, y0 + h), slice(x0, x0 + w)
+        edges = self.as_array(self.edges)[rows, cols]
+        if self.field is not None:
+            ys, xs = np.nonzero(window & ~edges)
+            gained = ((ys + y0) * self.width + xs + x0).tolist()
+        edges |= window
+        self.as_array(self.known)[rows, cols] |= free
+        self.as_array(self.blocked)[rows, cols] |= ~free
+        if self.field is not None:
+            self._edges_gained(gained)
+
+    def _edges_gained(self, nodes):
+        """
+        Avisa al campo de distancias que nodes ganaron aristas.
+        """
+        for node in nodes:
+            self.field.node_changed(node)
+
+    def distance_field(self):
+        if self.field is None:
+            self.field = DistanceField(self)
+        return self.field
+
+    # Búsquedas
+
+    def path_to(self, node):
+        """
+        Camino (lista de nodos) de la última búsqueda desde su inicio hasta node.
+        """
+        path = []
+        prev = self.buffers.prev
+        while node >= 0:
+            path.append(node)
+            node = prev[node]
+        path.reverse()
+        return path
+
+    def nearest_path(self, start, goals, max_dist=None):
+        """
+        Camino más corto (costo 1 por paso) de start a la más cercana de goals, con una sola búsqueda.
+        goals es cualquier contenedor de nodos con 'in'; con max_dist la búsqueda se corta en
+        esa distancia. Regresa la lista de nodos o None.
+        """
+        buffers = self.buffers
+        search = buffers.new_search()
+        dist, prev, stamp = buffers.dist, buffers.prev, buffers.stamp
+        edges, neighbor_offsets = self.edges, self.neighbor_offsets
+        dist[start] = 0
+        prev[start] = -1
+        stamp[start] = search
+        heap = [(0, start)]
+
+        while heap:
+            current_dist, u = heapq.heappop(heap)
+            if current_dist > dist[u]:
+                continue
+            if u in goals:
+                return self.path_to(u)
+            if current_dist == max_dist:
+                continue
+
+            alt = current_dist + 1
+            for off in neighbor_offsets[edges[u]]:
+                v = u + off
+                if stamp[v] != search or alt < dist[v]:
+                    stamp[v] = search
+                    dist[v] = alt
+                    prev[v] = u
+                    heapq.heappush(heap, (alt, v))
+
+        return None
+
+    def distances(self, start, goals):
+        """
+        Distancia exacta (pasos por las aristas conocidas) de start a cada uno de goals, con una
+        sola búsqueda en anchura que termina al encontrarlos todos.
+        Regresa un diccionario nodo -> distancia solo con los alcanzables.
+        """
+        buffers = self.buffers
+        search = buffers.new_search()
+        dist, stamp = buffers.dist, buffers.stamp
+        edges, neighbor_offsets = self.edges, self.neighbor_offsets
+        dist[start] = 0
+        stamp[start] = search
+        found = {}
+        frontier = [start]
+        while frontier and len(found) < len(goals):
+            next_frontier = []
+            for u in frontier:
+                if u in goals:
+                    found[u] = dist[u]
+                alt = dist[u] + 1
+                for off in neighbor_offsets[edges[u]]:
+                    v = u + off
+                    if stamp[v] != search:
+                        stamp[v] = search
+                        dist[v] = alt
+                        next_frontier.append(v)
+            frontier = next_frontier
+        return found
+
+
+class DistanceField:
+    """
+    Distancia (en pasos) de cada nodo del mapa a la fuente más cercana, reparada de forma
+    incremental cuando el mapa gana aristas o fuentes. Las reparaciones se acumulan y se
+    aplican al consultar una distancia.
+    Args:
+        knowledge: KnowledgeMap sobre el que se mide la distancia
+    """
+    INF = 2 ** 31 - 1
+
+    def __init__(self, knowledge):
+        self.map = knowledge
+        self.dist = array("i", [self.INF]) * knowledge.size
+        self.sources = set()
+        self.heap = [] # (distancia propuesta, nodo) pendientes de propagar
+
+    def add_source(self, node):
+        if node not in self.sources:
+            self.sources.add(node)
+            heapq.heappush(self.heap, (0, node))
+
+    def edge_added(self, u, v):
+        """
+        La arista u - v es nueva: el extremo más lejano puede mejorar pasando por el otro.
+        """
+        du, dv = self.dist[u], self.dist[v]
+        if du + 1 < dv:
+            heapq.heappush(self.heap, (du + 1, v))
+        elif dv + 1 < du:
+            heapq.heappush(self.heap, (dv + 1, u))
+
+    def node_changed(self, node):
+        """
+        node ganó aristas (de cualquier vecino): puede mejorar pasando por alguno de ellos.
+        """
+        dist = self.dist
+        best = min((dist[v] for v in self.map.neighbors(node)), default=self.INF)
+        if best + 1 < dist[node]:
+            heapq.heappush(self.heap, (best + 1, node))
+
+    def repair(self):
+        """
+        Propaga las mejoras pendientes; solo visita los nodos cuya distancia baja.
+        """
+        heap, dist = self.heap, self.dist
+        edges, neighbor_offsets = self.map.edges, self.map.neighbor_offsets
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d >= dist[u]:
+                continue
+            dist[u] = d
+            alt = d + 1
+            for off in neighbor_offsets[edges[u]]:
+                v = u + off
+                if alt < dist[v]:
+                    heapq.heappush(heap, (alt, v))
+
+    def distance(self, node):
+        """
+        Pasos de node a la fuente más cercana, o None si ninguna es alcanzable.
+        """
+        self.repair()
+        d = self.dist[node]
+        return None if d == self.INF else d
@@ -0,0 +1,189 @@
+# Asignación de la suciedad conocida por subasta (allocation="market" en el modelo).
+# Sin coordinación, cada Roomba solo limpia lo que se encuentra en su vecindad y varios terminan
+# barriendo la misma zona mientras la suciedad lejana espera. El coordinador de la flota junta
+# las celdas sucias que ve cualquier Roomba en un índice espacial por cubetas y, al inicio de
+# cada paso, subasta las que nadie tiene asignadas entre los Roombas explorando sin objetivo.
+#
+# Cada Roomba ofrece por la celda sucia conocida más cercana que puede alcanzar por su mapa
+# interno (una sola búsqueda hacia las candidatas de las cubetas cercanas), siempre que su
+# batería alcance para llegar, limpiarla y volver a una estación según su campo de distancias.
+# La oferta más baja gana; los que ofrecían por esa misma celda vuelven a ofrecer por otra.
+# Las asignaciones se actualizan de forma incremental: al limpiarse una celda (la limpie quien
+# la limpie) se libera su dueño, y un Roomba que se va a cargar suelta su objetivo.
+
+BUCKET = 8 # Lado de las cubetas del índice, en celdas
+CANDIDATOS = 8 # Celdas sucias más cercanas que considera cada oferta
+
+
+class DirtIndex:
+    """
+    Hash espacial por cubetas de BUCKET x BUCKET celdas con las celdas sucias sin asignar.
+    """
+    def __init__(self, bucket=BUCKET):
+        self.bucket = bucket
+        self.buckets = {} # (bx, by) -> conjunto de coordenadas
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, coord):
+        return coord in self.buckets.get((coord[0] // self.bucket, coord[1] // self.bucket), ())
+
+    def __iter__(self):
+        for cells in self.buckets.values():
+            yield from cells
+
+    def add(self, coord):
+        cells = self.buckets.setdefault((coord[0] // self.bucket, coord[1] // self.bucket), set())
+        if coord not in cells:
+            cells.add(coord)
+            self.size += 1
+
+    def discard(self, coord):
+        key = (coord[0] // self.bucket, coord[1] // self.bucket)
+        cells = self.buckets.get(key)
+        if cells and coord in cells:
+            cells.remove(coord)
+            self.size -= 1
+            if not cells:
+                del self.buckets[key]
+
+    def near(self, coord, limit):
+        """
+        Regresa hasta limit celdas, las más cercanas a coord (distancia de Chebyshev).
+        Recorre las cubetas en anillos alrededor de la de coord hasta que ninguna cubeta más
+        lejana pueda tener una celda más cercana que las encontradas.
+        """
+        if not self.size:
+            return []
+        x, y = coord
+        cx, cy = x // self.bucket, y // self.bucket
+        last = max(max(abs(bx - cx), abs(by - cy)) for bx, by in self.buckets)
+
+        def distance(c):
+            return max(abs(c[0] - x), abs(c[1] - y))
+
+        found = []
+        for ring in range(last + 1):
+            for bx in range(cx - ring, cx + ring + 1):
+                step = 1 if abs(bx - cx) == ring else 2 * ring # Solo el contorno del anillo
+                for by in range(cy - ring, cy + ring + 1, step):
+                    found.extend(self.buckets.get((bx, by), ()))
+            if len(found) >= limit:
+                found.sort(key=lambda c: (distance(c), c))
+                # Las cubetas del siguiente anillo están al menos a ring * bucket + 1
+                if distance(found[limit - 1]) <= ring * self.bucket + 1:
+                    break
+        found.sort(key=lambda c: (distance(c), c))
+        return found[:limit]
+
+
+class FleetCoordinator:
+    """
+    Coordinador de la flota: celdas sucias conocidas y a qué Roomba está asignada cada una.
+    Args:
+        model: RandomModel con sus Roombas y el grid
+    """
+    def __init__(self, model):
+        self.model = model
+        self.dirt = DirtIndex() # Sucias conocidas sin asignar
+        self.targets = {} # Roomba -> coordenada asignada
+        self.owners = {}  # Coordenada asignada -> Roomba
+        self.awarded = 0  # Para estadísticas
+
+    def observe(self, robot):
+        """
+        Agrega las celdas sucias que el Roomba ve a su alrededor (lee la capa "dirty" del grid).
+        """
+        r = robot.sensor_radius
+        x, y = robot.cell.coordinate
+        x0, y0 = max(0, x - r), max(0, y - r)
+        dirty = self.model.grid.dirty.data[x0:x + r + 1, y0:y + r + 1]
+        if not dirty.any():
+            return
+        xs, ys = dirty.nonzero()
+        for coord in zip((xs + x0).tolist(), (ys + y0).tolist()):
+            if coord not in self.owners:
+                self.dirt.add(coord)
+
+    def cleaned(self, coord):
+        """
+        La celda se limpió: sale del índice y su dueño, si tenía, queda libre.
+        """
+        self.dirt.discard(coord)
+        owner = self.owners.pop(coord, None)
+        if owner is not None:
+            del self.targets[owner]
+            owner.target_path = []
+
+    def release(self, robot):
+        """
+        El Roomba suelta su objetivo (se va a cargar, murió o ya no lo alcanza); vuelve a subasta.
+        """
+        coord = self.targets.pop(robot, None)
+        robot.target_path = []
+        if coord is None:
+            return
+        del self.owners[coord]
+        if self.model.grid.dirty.data[coord]:
+            self.dirt.add(coord)
+
+    def bid(self, robot):
+        """
+        Oferta del Roomba: (pasos, coordenada, camino) hacia la celda sucia sin asignar más cercana
+        que alcanza por su mapa y con batería para volver a cargar, o None si no hay ninguna.
+        """
+        knowledge = robot.map
+        position = robot.cell.coordinate
+        goals = set()
+        for coord in self.dirt.near(position, CANDIDATOS):
+            node = knowledge.node(coord)
+            if knowledge.known[node]:
+                goals.add(node)
+        if not goals:
+            return None
+        # Llegar y limpiar cuesta cost + 1 y al terminar no debe quedar ya con batería baja
+        # (más de back + 2, con back >= 0): más allá de battery - 4 pasos no vale la pena buscar
+        reach = robot.battery - 4
+        if reach < 0:
+            return None
+        path = knowledge.nearest_path(knowledge.node(position), goals, max_dist=reach)
+        if path is None:
+            return None
+
+        cost = len(path) - 1
+        back = robot.station_field().distance(path[-1])
+        if back is None or robot.battery - cost - 1 <= back + 2:
+            return None
+        return cost, knowledge.coord(path[-1]), [knowledge.coord(node) for node in path[1:]]
+
+    def auction(self):
+        """
+        Subasta las celdas sucias sin asignar entre los Roombas explorando sin objetivo.
+        Gana la oferta más baja (empates por unique_id); los que ofrecían por la misma celda
+        vuelven a ofrecer por la siguiente que tengan más cerca.
+        """
+        if not self.dirt:
+            return
+        bids = {}
+        for robot in self.model.roombas:
+            if robot.state == "EXPLORING" and robot not in self.targets:
+                offer = self.bid(robot)
+                if offer is not None:
+                    bids[robot] = offer
+
+        while bids:
+            robot = min(bids, key=lambda r: (bids[r][0], r.unique_id))
+            _, coord, path = bids.pop(robot)
+            self.dirt.discard(coord)
+            self.targets[robot] = coord
+            self.owners[coord] = robot
+            robot.target_path = path
+            self.awarded += 1
+            for other in [r for r, offer in bids.items() if offer[1] == coord]:
+                offer = self.bid(other)
+                if offer is None:
+                    del bids[other]
+                else:
+                    bids[other] = offer
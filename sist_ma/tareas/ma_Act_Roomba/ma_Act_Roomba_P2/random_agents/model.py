@@ -1,8 +1,18 @@
+import numpy as np
 from mesa import Model
 from mesa.discrete_space import OrthogonalMooreGrid
-from mesa.datacollection import DataCollector
 
 from .agent import ObstacleAgent, RoombaRobot, DirtPatch, ChargingStation
+from .reservation import ReservationTable
+from .spatial_index import RobotIndex
+from .coverage import assign_regions
+from .market import FleetCoordinator
+from .collector import ColumnarCollector
+from .action_log import ActionLog
+from .knowledge_map import SearchBuffers
+
+EXPLORATIONS = ("random", "coverage")
+ALLOCATIONS = ("local", "market")
 
 
 class RandomModel(Model):
@@ -11,8 +21,19 @@ class RandomModel(Model):
     Args:
         num_agents: Number of agents in the simulation
         height, width: The size of the grid to model
+        use_property_layers: Si es True, los obstáculos y la suciedad solo viven en las capas
+            "obstacle" y "dirty" del grid, sin crear un ObstacleAgent o DirtPatch por celda
+        sensor_radius: Celdas que cada Roomba ve a su alrededor; 1 son sus 8 vecinas
+        exploration: "random" (vecinos sucios o sin visitar y pendientes más cercanas) o
+            "coverage" (cada Roomba recorre su franja del grid en boustrophedon y luego explora como en random)
+        allocation: "local" (cada Roomba limpia la suciedad que encuentra) o "market" (un coordinador
+            subasta en cada paso la suciedad conocida entre los Roombas, ver market.py)
+        collect_every: Pasos entre dos muestras de las métricas (siempre se guarda la del último paso)
+        collect_dir: Carpeta donde escribir por bloques las métricas (.npz), None para dejarlas en memoria
+        record_actions: Si es True guarda en action_log cada acción de los Roombas, para revisar la
+            corrida con action_log.LogReplay sin volver a simularla
     """
-    def __init__(self, num_agents, width=8, height=8, percent_dirty = 0.3, percent_obstacles = 0.05, max_steps = 3000, seed=42):
+    def __init__(self, num_agents, width=8, height=8, percent_dirty = 0.3, percent_obstacles = 0.05, max_steps = 3000, seed=42, use_property_layers=False, exploration="random", sensor_radius=1, allocation="local", collect_every=1, collect_dir=None, record_actions=False):
 
         super().__init__(seed=seed)
         self.num_agents = num_agents
@@ -22,32 +43,77 @@ class RandomModel(Model):
         self.percent_dirty = percent_dirty
         self.percent_obstacles = percent_obstacles
         self.max_steps = max_steps
+        self.use_property_layers = use_property_layers
+        if exploration not in EXPLORATIONS:
+            raise ValueError(f"exploration debe ser uno de {EXPLORATIONS}, no {exploration!r}")
+        self.exploration = exploration
+        self.sensor_radius = sensor_radius
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"allocation debe ser uno de {ALLOCATIONS}, no {allocation!r}")
+        self.allocation = allocation
 
         self.grid = OrthogonalMooreGrid([width, height], torus=False)
 
+        # Obstáculos y suciedad como capas booleanas del grid (indexadas [x, y]).
+        # Son la fuente de verdad en ambos modos; cell.obstacle y cell.dirty las leen y escriben.
+        self.grid.create_property_layer("obstacle", default_value=False, dtype=bool)
+        self.grid.create_property_layer("dirty", default_value=False, dtype=bool)
+
         self.initial_dirty_cells = 0 # Cuántas celdas empezaron sucias
         self.cleaned_cells = 0 # Cuántas se han limpiado
 
-        # Data collector para recopilar estadísticas con funciones lambda. 
-        self.datacollector = DataCollector(
+        # Recolector por columnas para las estadísticas con funciones lambda, ver collector.py
+        self.collect_every = collect_every
+        self.collect_dir = collect_dir
+        self.datacollector = ColumnarCollector(
+            every=collect_every,
+            directory=collect_dir,
             model_reporters={
-                "CleanedPatches": lambda m: sum([1 for a in m.agents_by_type[DirtPatch] if not a.dirty]),  # Celdas limpiadas
-                "DirtyPatches": lambda m: sum([1 for a in m.agents_by_type[DirtPatch] if a.dirty]),  # Celdas sucias
+                "CleanedPatches": lambda m: m.initial_dirty_cells - m.dirt_left(),  # Celdas limpiadas
+                "DirtyPatches": lambda m: m.dirt_left(),  # Celdas sucias
                 "TotalMoves": lambda m: sum([a.moves for a in m.roombas]),  # Total de movimientos de los Roombas
                 "AvgBattery": lambda m: sum([a.battery for a in m.roombas]) / len(m.roombas) if m.roombas else 0,  # Promedio de batería
             }
         )
 
+        self.build_world()
+
+        # Índice espacial celda -> Roombas, se actualiza cuando un Roomba se mueve
+        self.robot_index = RobotIndex()
+
+        # Tabla compartida de celdas reservadas y filas de las estaciones de carga
+        self.reservations = ReservationTable()
+
+        # Buffers de búsqueda de los mapas internos de este modelo, ver knowledge_map.py
+        self.search_buffers = SearchBuffers(width * height)
+
+        # Coordinador de la flota que subasta la suciedad conocida, solo con allocation="market"
+        self.coordinator = FleetCoordinator(self) if allocation == "market" else None
+
+        self.roombas = []
+        self.place_roombas()
+
+        self.current_step = 0
+        self.running = True
+
+        # Bitácora de acciones desde el estado inicial ya construido
+        self.action_log = ActionLog(self) if record_actions else None
+
+
+    def build_world(self):
+        """
+        Crea el borde, los obstáculos internos y la suciedad del grid.
+        """
         # Identify the coordinates of the border of the grid
-        border = [(x,y)
-                  for y in range(height)
-                  for x in range(width)
-                  if y in [0, height-1] or x in [0, width - 1]]
+        border = {(x,y)
+                  for y in range(self.height)
+                  for x in range(self.width)
+                  if y in [0, self.height-1] or x in [0, self.width - 1]}
 
         # Create the border cells
         for _, cell in enumerate(self.grid):
             if cell.coordinate in border:
-                ObstacleAgent(self, cell=cell)
+                self.add_obstacle(cell)
 
         # Creamos los obstaculos internos aleatoriamente
         for cell in self.grid.all_cells:
@@ -55,25 +121,27 @@ class RandomModel(Model):
                 continue  # ya tienen obstáculo
 
             if self.random.random() < self.percent_obstacles:
-                ObstacleAgent(self, cell=cell)
+                self.add_obstacle(cell)
         
         # Crear las celdas de suciedad aleatoriamente
         for cell in self.grid.all_cells:
             # No ensuciar obstáculo
-            if any(isinstance(a, ObstacleAgent) for a in cell.agents):
+            if cell.obstacle:
                 continue
 
             if self.random.random() < self.percent_dirty:
-                DirtPatch(self, cell)
+                self.add_dirt(cell)
                 self.initial_dirty_cells += 1
 
+    def place_roombas(self):
+        """
+        Crea la estación de carga de cada Roomba en una celda libre y al Roomba sobre ella.
+        """
         # Crear los agentes Roomba
         # Crear las diferentes Roombas y sus estaciones de carga
-        self.roombas = []
-
         for _ in range(self.num_agents):
-            # escoger una celda vacía para la estación de ese agente
-            cell = self.random.choice(self.grid.empties.cells)
+            # escoger una celda vacía para la estación de ese agente (sin agentes, obstáculo ni suciedad)
+            cell = self.random.choice(self.free_cells())
 
             # Crear estación de carga
             ChargingStation(self, cell=cell)
@@ -84,20 +152,103 @@ class RandomModel(Model):
                 cell=cell,
                 battery=100,
                 low_battery_threshold=20,
+                sensor_radius=self.sensor_radius,
             )
             self.roombas.append(roomba)
-            
-        self.current_step = 0
-        self.running = True
 
+        # Franjas de la cobertura sistemática, ya que se conocen las estaciones de todos
+        if self.exploration == "coverage":
+            assign_regions(self)
 
-    def step(self):        
-        self.current_step += 1
+    def add_obstacle(self, cell):
+        """
+        Marca la celda como obstáculo; sin capas también crea su ObstacleAgent.
+        """
+        cell.obstacle = True
+        if not self.use_property_layers:
+            ObstacleAgent(self, cell=cell)
+
+    def add_dirt(self, cell):
+        """
+        Ensucia la celda; sin capas también crea su DirtPatch.
+        """
+        cell.dirty = True
+        if not self.use_property_layers:
+            DirtPatch(self, cell)
+
+    def free_cells(self):
+        """
+        Celdas sin agentes, obstáculo ni suciedad. Sin capas son las mismas que grid.empties.
+        """
+        return self.grid.all_cells.select(
+            lambda cell: cell.is_empty and not cell.obstacle and not cell.dirty
+        ).cells
+
+    def dirt_left(self):
+        """
+        Cuántas celdas siguen sucias.
+        """
+        return int(self.grid.dirty.data.sum())
+
+    def grid_raster(self):
+        """
+        Regresa el estado fijo del grid como un arreglo (width, height) de códigos, indexado [x, y]:
+        0 libre o limpia, 1 sucia, 2 obstáculo, 3 estación de carga.
+        Sirve para dibujar todo el grid con un solo imshow en lugar de un marcador por agente.
+        """
+        raster = np.zeros((self.width, self.height), dtype=np.int8)
+        raster[self.grid.dirty.data] = 1
+        raster[self.grid.obstacle.data] = 2
+        for station in self.agents_by_type.get(ChargingStation, []):
+            raster[station.cell.coordinate] = 3
+        return raster
+
+    def snapshot(self):
+        """
+        Foto ligera del estado para dibujar sin tocar el modelo: el raster del grid,
+        la posición y estado de cada Roomba y el paso actual.
+        """
+        return {
+            "step": self.current_step,
+            "raster": self.grid_raster(),
+            "robots": [(r.cell.coordinate[0], r.cell.coordinate[1], r.state) for r in self.roombas],
+        }
+
+    def share_knowledge(self):
+        """
+        Intercambio de conocimiento de toda la flota en una sola pasada.
+        Los encuentros se calculan una vez por paso con el índice espacial; cada grupo de
+        Roombas conectados por encuentros termina con la unión de sus mapas.
+        """
+        for group in self.robot_index.encounter_groups(self.roombas):
+            leader = group[0]
+            for robot in group[1:]:
+                leader.merge_knowledge_from(robot)
+            for robot in group[1:]:
+                robot.merge_knowledge_from(leader)
+
+    def advance(self):
+        """
+        Avanza a los Roombas un paso (reservaciones, subasta, acciones y mapas compartidos)
+        sin revisar si la simulación terminó ni recolectar métricas.
+        """
+        self.reservations.purge(self.current_step - 1)  # Las reservaciones pasadas ya no sirven
+        # Repartir la suciedad conocida sin asignar antes de que se muevan los Roombas
+        if self.coordinator is not None:
+            self.coordinator.auction()
         # Actualizar cada Roomba
         for roomba in self.roombas:
             roomba.step()
+        # Compartir mapas entre los Roombas que se encontraron en este paso
+        self.share_knowledge()
+        if self.action_log is not None:
+            self.action_log.end_step(self.roombas)
+
+    def step(self):        
+        self.current_step += 1
+        self.advance()
         # Determinar si toda la suciedad desapareció en cada paso
-        dirt_left = sum(1 for a in self.grid.all_cells if any(isinstance(agent, DirtPatch) and agent.dirty for agent in a.agents))
+        dirt_left = self.dirt_left()
 
         # Condiciones para terminar la simulación
         if self.current_step >= self.max_steps:
@@ -114,7 +265,9 @@ class RandomModel(Model):
         if dirt_left <= 0:
             self.running = False
 
-        self.datacollector.collect(self) 
+        self.datacollector.collect(self)
+        if not self.running:
+            self.datacollector.flush()  # Escribir el último bloque de métricas, si hay carpeta
 
         if self.running == False:
                 print("------------------------------------------------")
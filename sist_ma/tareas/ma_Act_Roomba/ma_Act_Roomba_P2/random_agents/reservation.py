@@ -0,0 +1,151 @@
+from collections import deque
+
+# Tabla de reservaciones espacio-tiempo compartida por todos los Roombas del modelo.
+# Cada Roomba que va a cargar reserva las celdas de su camino en el paso (tick) en que
+# las va a ocupar, así los demás planean alrededor de ellas en lugar de chocar.
+# Las estaciones de carga tienen además una fila (queue) para tomar turnos.
+
+class ReservationTable:
+    """
+    Tabla de reservaciones (coordenada, tiempo) -> Roomba y filas de espera por estación.
+    """
+    def __init__(self):
+        self.cells = {}  # (coord, t) -> agente que la reservó
+        self.by_agent = {}  # agente -> lista de llaves (coord, t) que reservó
+        self.station_queues = {}  # coord de la estación -> deque de agentes esperando turno
+
+    # Reservaciones de celdas en el tiempo
+
+    def owner(self, coord, t):
+        """
+        Regresa el agente que reservó la celda en el tiempo t, o None si está libre.
+        """
+        return self.cells.get((coord, t))
+
+    def is_reserved(self, coord, t, agent=None):
+        """
+        Regresa True si la celda está reservada en el tiempo t por un agente distinto a 'agent'.
+        """
+        owner = self.cells.get((coord, t))
+        return owner is not None and owner is not agent
+
+    def is_swap(self, u, v, t, agent=None):
+        """
+        Regresa True si moverse de u (en t-1) a v (en t) cruza de frente a otro agente
+        que va de v a u en el mismo paso.
+        """
+        other = self.cells.get((v, t - 1))
+        return other is not None and other is not agent and self.cells.get((u, t)) is other
+
+    def reserve_path(self, agent, path, start_time):
+        """
+        Reserva el camino para el agente. path[i] se ocupa en el tiempo start_time + i.
+        Borra antes las reservaciones previas del agente.
+        """
+        self.release(agent)
+        keys = []
+        for i, coord in enumerate(path):
+            key = (coord, start_time + i)
+            self.cells[key] = agent
+            keys.append(key)
+        self.by_agent[agent] = keys
+
+    def reserve_wait(self, agent, coord, t, steps):
+        """
+        Reserva la celda coord para el agente de t a t + steps - 1, en los tiempos en que nadie
+        más la tenga reservada. Borra antes las reservaciones previas del agente.
+        """
+        self.release(agent)
+        keys = []
+        for dt in range(steps):
+            key = (coord, t + dt)
+            if key not in self.cells:
+                self.cells[key] = agent
+                keys.append(key)
+        self.by_agent[agent] = keys
+
+    def release(self, agent):
+        """
+        Libera todas las celdas reservadas por el agente.
+        """
+        for key in self.by_agent.pop(agent, []):
+            if self.cells.get(key) is agent:
+                del self.cells[key]
+
+    def entries(self):
+        """
+        Regresa las reservaciones como lista de (coord, t, agente), por ejemplo para un checkpoint.
+        """
+        return [(coord, t, agent) for (coord, t), agent in self.cells.items()]
+
+    def restore(self, entries):
+        """
+        Vuelve a cargar reservaciones (coord, t, agente) como las regresa entries.
+        """
+        for coord, t, agent in entries:
+            key = (coord, t)
+            self.cells[key] = agent
+            self.by_agent.setdefault(agent, []).append(key)
+
+    def purge(self, t):
+        """
+        Elimina las reservaciones de tiempos anteriores a t, ya no sirven.
+        """
+        for agent in list(self.by_agent):
+            keys = [key for key in self.by_agent[agent] if key[1] >= t]
+            for key in self.by_agent[agent]:
+                if key[1] < t and self.cells.get(key) is agent:
+                    del self.cells[key]
+            if keys:
+                self.by_agent[agent] = keys
+            else:
+                del self.by_agent[agent]
+
+    # Filas de espera de las estaciones de carga
+
+    def join_queue(self, station, agent):
+        """
+        Forma al agente en la fila de la estación (si no estaba ya) y regresa su posición en ella.
+        """
+        queue = self.station_queues.setdefault(station, deque())
+        if agent not in queue:
+            queue.append(agent)
+        return queue.index(agent)
+
+    def leave_queue(self, agent):
+        """
+        Saca al agente de cualquier fila en la que esté.
+        """
+        for station, queue in list(self.station_queues.items()):
+            if agent in queue:
+                queue.remove(agent)
+            if not queue:
+                del self.station_queues[station]
+
+    def queued_station(self, agent):
+        """
+        Regresa la estación en cuya fila está el agente, o None.
+        """
+        for station, queue in self.station_queues.items():
+            if agent in queue:
+                return station
+        return None
+
+    def queue_length(self, station):
+        """
+        Regresa cuántos agentes están formados en la estación.
+        """
+        return len(self.station_queues.get(station, ()))
+
+    def queues(self):
+        """
+        Regresa las filas como lista de (estación, lista de agentes en orden de turno).
+        """
+        return [(station, list(queue)) for station, queue in self.station_queues.items()]
+
+    def is_turn(self, station, agent):
+        """
+        Regresa True si el agente es el primero de la fila de la estación (o si no hay fila).
+        """
+        queue = self.station_queues.get(station)
+        return not queue or queue[0] is agent
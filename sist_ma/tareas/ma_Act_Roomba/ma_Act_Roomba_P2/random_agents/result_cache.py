@@ -0,0 +1,179 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+
+from .checkpoint import summary
+from .model import RandomModel
+
+# Caché en disco de resultados de corridas completas.
+# Los modelos son deterministas dada la semilla, así que una corrida con los mismos parámetros
+# (y el mismo código) siempre da el mismo resultado. Cada resultado se guarda en un .npz cuyo
+# nombre es el hash de la clase del modelo, sus parámetros y la versión del código (hash de los
+# .py del paquete); si se cambia el código, las entradas viejas ya no coinciden.
+# El directorio tiene un tamaño máximo: al pasarse se borran las entradas usadas hace más tiempo.
+
+DEFAULT_DIR = os.environ.get("RESULT_CACHE_DIR", ".result_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_code_versions = {}
+
+
+def code_version(model_cls):
+    """Hash del código fuente del paquete donde está definida la clase del modelo."""
+    package = Path(inspect.getfile(model_cls)).parent
+    if package not in _code_versions:
+        digest = hashlib.sha256()
+        for path in sorted(package.glob("*.py")):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        _code_versions[package] = digest.hexdigest()
+    return _code_versions[package]
+
+
+def _canonical(value):
+    """Convierte un parámetro en algo que json puede escribir siempre igual."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if hasattr(value, "__dict__"):
+        return [type(value).__name__, _canonical(vars(value))]
+    return value
+
+
+def cache_key(model_cls, params, **extra):
+    """Llave de una corrida: clase del modelo, parámetros, versión del código y extras (como los pasos)."""
+    content = {
+        "model": f"{model_cls.__module__}.{model_cls.__qualname__}",
+        "params": _canonical(params),
+        "code": code_version(model_cls),
+        "extra": _canonical(extra),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Resultados guardados en disco, direccionados por contenido, con desalojo LRU por tamaño.
+    Args:
+        directory: Carpeta de la caché
+        max_bytes: Tamaño máximo de la carpeta
+    """
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.directory / f"{key}.npz"
+
+    def get(self, key):
+        """
+        Regresa (arreglos, meta) guardados con la llave, o None si no están.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files if name != "meta"}
+                meta = json.loads(str(data["meta"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError): # Entrada incompleta o dañada
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path) # Marcar como usada recientemente para el LRU
+        return arrays, meta
+
+    def put(self, key, arrays, meta):
+        """
+        Guarda arreglos de NumPy y un diccionario meta (que json pueda escribir) con la llave.
+        """
+        # Escribir a un archivo temporal y renombrarlo, así nunca queda una entrada a medias
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Borra las entradas usadas hace más tiempo hasta que la carpeta quepa en max_bytes.
+        """
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+
+def _run(params):
+    """
+    Corre RandomModel(**params) hasta que termine y regresa lo que se guarda en la caché.
+    """
+    model = RandomModel(**params)
+    while model.running:
+        model.step()
+    return {"summary": summary(model), "model_vars": model.datacollector.model_vars}
+
+
+def cached_run(params, cache=None):
+    """
+    Corre RandomModel(**params) hasta que termine, o regresa el resultado guardado de una corrida igual.
+    Regresa {"summary": resumen de checkpoint.summary, "model_vars": métricas del DataCollector}.
+    """
+    cache = cache or ResultCache()
+    key = cache_key(RandomModel, params)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit[1]
+    result = _run(params)
+    cache.put(key, {}, result)
+    return result
+
+
+def sweep(param_list, cache=None, processes=None):
+    """
+    Corre cada conjunto de parámetros en procesos separados usando la caché. Los que ya estaban
+    guardados no se vuelven a correr y cada resultado nuevo se guarda en cuanto termina, así
+    repetir un barrido que se quedó a medias solo corre los puntos que faltaban.
+    Regresa los resultados en el mismo orden que param_list.
+    """
+    cache = cache or ResultCache()
+    keys = [cache_key(RandomModel, params) for params in param_list]
+    results = []
+    pending = []
+    for i, (key, params) in enumerate(zip(keys, param_list)):
+        hit = cache.get(key)
+        results.append(None if hit is None else hit[1])
+        if hit is None:
+            pending.append(i)
+
+    if pending:
+        with Pool(processes) as pool:
+            for i, result in zip(pending, pool.imap(_run, [param_list[i] for i in pending])):
+                cache.put(keys[i], {}, result)
+                results[i] = result
+    return results
@@ -0,0 +1,85 @@
+# Índice espacial (hash de celdas) para encontrar rápido a los Roombas que están cerca.
+# El modelo lo mantiene actualizado cada vez que un Roomba cambia de celda, así no hay
+# que revisar todos los agentes de cada celda vecina para saber con quién compartir el mapa.
+
+# Desplazamientos de la vecindad de Moore más la propia celda
+VECINDAD = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+class RobotIndex:
+    """
+    Hash espacial coordenada -> lista de Roombas en esa celda.
+    """
+    def __init__(self):
+        self.cells = {}
+
+    def add(self, robot, coord):
+        self.cells.setdefault(coord, []).append(robot)
+
+    def remove(self, robot, coord):
+        robots = self.cells.get(coord)
+        if robots and robot in robots:
+            robots.remove(robot)
+            if not robots:
+                del self.cells[coord]
+
+    def move(self, robot, old_coord, new_coord):
+        """
+        Actualiza el índice cuando un Roomba se mueve de old_coord a new_coord.
+        """
+        if old_coord is not None:
+            self.remove(robot, old_coord)
+        if new_coord is not None:
+            self.add(robot, new_coord)
+
+    def robots_near(self, coord):
+        """
+        Regresa los Roombas en la celda y en sus 8 vecinas.
+        """
+        x, y = coord
+        near = []
+        for dx, dy in VECINDAD:
+            near.extend(self.cells.get((x + dx, y + dy), ()))
+        return near
+
+    def encounter_pairs(self, robots):
+        """
+        Regresa los pares (a, b) de Roombas vivos que están en la misma celda o en celdas vecinas.
+        Cada par aparece una sola vez (a.unique_id < b.unique_id).
+        """
+        pairs = []
+        for robot in robots:
+            if robot.state == "DEAD":
+                continue
+            for other in self.robots_near(robot.cell.coordinate):
+                if other.unique_id > robot.unique_id and other.state != "DEAD":
+                    pairs.append((robot, other))
+        return pairs
+
+    def encounter_groups(self, robots):
+        """
+        Agrupa a los Roombas que se encontraron, directa o indirectamente (a con b y b con c),
+        usando union-find sobre los pares de encuentro. Solo regresa grupos de 2 o más.
+        """
+        parent = {}
+
+        def find(robot):
+            root = robot
+            while parent.get(root, root) is not root:
+                root = parent[root]
+            while robot is not root: # Comprimir el camino
+                parent[robot], robot = root, parent.get(robot, robot)
+            return root
+
+        for a, b in self.encounter_pairs(robots):
+            root_a, root_b = find(a), find(b)
+            if root_a is not root_b:
+                parent[root_b] = root_a
+
+        groups = {}
+        for robot in parent:
+            groups.setdefault(find(robot), []).append(robot)
+        for root in groups:
+            if root not in groups[root]:
+                groups[root].append(root)
+        return [group for group in groups.values() if len(group) > 1]